@@ -2,6 +2,7 @@ from abc import ABC, abstractmethod
 from typing import Dict, Any, Optional
 from pydantic import BaseModel
 from datetime import datetime
+from app.models.call import TranscriptMessage
 
 
 class CallRequest(BaseModel):
@@ -26,6 +27,7 @@ class WebhookEvent(BaseModel):
     call_id: str
     data: Dict[str, Any]
     timestamp: str
+    transcript: Optional[TranscriptMessage] = None  # set for 'transcript' events
 
 
 class VoiceProviderAdapter(ABC):
@@ -8,6 +8,7 @@ from app.adapters.base import (
     WebhookEvent
 )
 from app.config import settings
+from app.models.call import TranscriptMessage
 
 
 class RetellAdapter(VoiceProviderAdapter):
@@ -95,11 +96,47 @@ class RetellAdapter(VoiceProviderAdapter):
         call_id = raw_data.get("call_id", "")
         timestamp = raw_data.get("timestamp", datetime.utcnow().isoformat())
 
+        transcript = None
+        if normalized_type == "transcript":
+            transcript = self._normalize_transcript(raw_data, timestamp)
+
         return WebhookEvent(
             event_type=normalized_type,
             call_id=call_id,
             data=raw_data,
-            timestamp=timestamp
+            timestamp=timestamp,
+            transcript=transcript
+        )
+
+    def _normalize_transcript(
+        self,
+        raw_data: Dict[str, Any],
+        timestamp: str
+    ) -> Optional[TranscriptMessage]:
+        """Extract the compact transcript entry from a Retell utterance.
+
+        Retell utterances look like { "role": "agent" | "user", "content": "...",
+        "words": [{ "word", "start", "end" }, ...] }, optionally nested in "data".
+        """
+        utterance = raw_data.get("data", raw_data)
+        text = utterance.get("content")
+        if not text:
+            return None
+
+        # Retell calls the AI side "agent"; store it as "assistant" like Vapi
+        role = utterance.get("role", "unknown")
+        if role == "agent":
+            role = "assistant"
+
+        words = utterance.get("words") or []
+
+        return TranscriptMessage(
+            role=role,
+            content=text,
+            timestamp=timestamp,
+            start=words[0].get("start") if words else None,
+            end=words[-1].get("end") if words else None,
+            is_final=utterance.get("is_final", True)
         )
 
     async def get_transcript(self, call_id: str) -> Dict[str, Any]:
@@ -8,6 +8,7 @@ from app.adapters.base import (
     WebhookEvent
 )
 from app.config import settings
+from app.models.call import TranscriptMessage
 
 
 class VapiAdapter(VoiceProviderAdapter):
@@ -153,11 +154,43 @@ class VapiAdapter(VoiceProviderAdapter):
         call_id = payload.get("call", {}).get("id", "")
         timestamp = payload.get("timestamp", datetime.utcnow().isoformat())
 
+        transcript = None
+        if normalized_type == "transcript":
+            transcript = self._normalize_transcript(payload, timestamp)
+
         return WebhookEvent(
             event_type=normalized_type,
             call_id=call_id,
             data=payload,   # always store the unwrapped payload
-            timestamp=timestamp
+            timestamp=timestamp,
+            transcript=transcript
+        )
+
+    def _normalize_transcript(
+        self,
+        payload: Dict[str, Any],
+        timestamp: str
+    ) -> Optional[TranscriptMessage]:
+        """Extract the compact transcript entry from a Vapi transcript message.
+
+        Vapi sends { "type": "transcript", "role": ..., "transcriptType":
+        "partial" | "final", "transcript": "...", "call": {...} }.
+        """
+        text = payload.get("transcript")
+        if not text:
+            return None
+
+        start = payload.get("secondsFromStart")
+        duration = payload.get("duration")
+        end = start + duration / 1000 if start is not None and duration else None
+
+        return TranscriptMessage(
+            role=payload.get("role", "unknown"),
+            content=text,
+            timestamp=timestamp,
+            start=start,
+            end=end,
+            is_final=payload.get("transcriptType", "final") == "final"
         )
 
     async def get_transcript(self, call_id: str) -> Dict[str, Any]:
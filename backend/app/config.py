@@ -24,6 +24,45 @@ class Settings(BaseSettings):
 
     # Google Maps
     google_maps_api_key: str = ""
+    places_concurrency: int = 8
+    places_transport: Literal["live", "record", "replay"] = "live"
+    places_fixture_path: str = "fixtures/places.json.gz"
+    places_replay_latency_ms: float = 0.0
+    places_replay_jitter_ms: float = 0.0
+    places_hedging_enabled: bool = False
+    places_hedge_budget: float = 0.05
+    places_hedge_initial_delay_ms: float = 1000.0
+
+    # Phone numbers
+    phone_default_country_code: str = "1"  # For numbers stored without a country code
+
+    # Call analysis
+    analysis_scorer: Literal["stub", "gemini"] = "stub"
+    gemini_api_key: str = ""
+    gemini_model: str = "gemini-2.0-flash-lite"
+    analysis_concurrency: int = 4
+    analysis_batch_size: int = 50
+    analysis_max_attempts: int = 3
+    analysis_worker_enabled: bool = False
+    analysis_interval_seconds: float = 60.0
+
+    # Call archival
+    archive_after_days: int = 90
+    archive_batch_size: int = 200
+    archive_worker_enabled: bool = False
+    archive_interval_seconds: float = 3600.0
+
+    # Export
+    export_chunk_size: int = 1000
+
+    # Caching
+    stats_cache_ttl_seconds: float = 30.0
+    record_cache_size: int = 2048
+    record_cache_ttl_seconds: float = 30.0
+    places_cache_size: int = 1024
+    places_cache_ttl_seconds: float = 3600.0
+    places_cache_path: str = ""
+    place_record_cache_size: int = 10000
 
     # CORS
     cors_origins: Union[str, list[str]] = "http://localhost:3000"
@@ -1,15 +1,39 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
+from app.database import supabase
+from app.services.analysis_service import run_analysis_worker
+from app.services.archive_service import run_archive_worker
+from app.services.search_service import close_places_client
 
 # Import routers
-from app.routers import leads, calls, search, import_files, webhooks, agents
+from app.routers import leads, calls, search, import_files, webhooks, agents, stats, analytics
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop background workers"""
+    workers = []
+    if settings.analysis_worker_enabled:
+        workers.append(asyncio.create_task(run_analysis_worker(supabase)))
+    if settings.archive_worker_enabled:
+        workers.append(asyncio.create_task(run_archive_worker(supabase)))
+
+    yield
+
+    for worker in workers:
+        worker.cancel()
+    await close_places_client()
+
 
 app = FastAPI(
     title=settings.app_name,
     description="AI-powered cold calling application with lead management",
     version="1.0.0",
     debug=settings.debug,
+    lifespan=lifespan,
 )
 
 # CORS middleware
@@ -28,6 +52,8 @@ app.include_router(search.router, prefix="/api/search", tags=["search"])
 app.include_router(import_files.router, prefix="/api/import", tags=["import"])
 app.include_router(webhooks.router, prefix="/webhooks", tags=["webhooks"])
 app.include_router(agents.router, prefix="/api/agents", tags=["agents"])
+app.include_router(stats.router, prefix="/api/stats", tags=["stats"])
+app.include_router(analytics.router, prefix="/api/analytics", tags=["analytics"])
 
 
 @app.get("/", tags=["root"])
@@ -20,10 +20,17 @@ class CallResponse(BaseModel):
 
 
 class TranscriptMessage(BaseModel):
-    """Individual message in a transcript"""
+    """Individual message in a transcript
+
+    This is the compact entry stored in calls.transcript for every provider,
+    instead of the raw webhook payload.
+    """
     role: str  # 'user' or 'assistant'
     content: str
-    timestamp: str
+    timestamp: Optional[str] = None
+    start: Optional[float] = None  # seconds from call start
+    end: Optional[float] = None
+    is_final: bool = True
 
 
 class CallBase(BaseModel):
@@ -73,6 +80,36 @@ class CallHistoryResponse(CallBase):
         from_attributes = True
 
 
+class CallAnalysisUpdate(BaseModel):
+    """Model for saving an AI-generated score and summary to a call"""
+    summary: str
+    ai_score: int
+    qualification: str  # "qualified" | "partial" | "unqualified"
+
+
+class CallAnalysisBatchItem(CallAnalysisUpdate):
+    """One call's analysis in a batch update"""
+    id: str
+
+
+class CallAnalysisBatchRequest(BaseModel):
+    """Model for saving many call analyses in one statement"""
+    analyses: List[CallAnalysisBatchItem] = Field(..., min_length=1, max_length=1000)
+
+
+class CallStatusBatchRequest(BaseModel):
+    """Model for fetching the status of many calls at once"""
+    ids: List[str] = Field(..., min_length=1, max_length=500)
+
+
+class CallStatus(BaseModel):
+    """Compact call status returned by the batch status endpoint"""
+    id: str
+    status: str
+    duration_seconds: Optional[int] = None
+    updated_at: Optional[datetime] = None
+
+
 class WebCallLog(BaseModel):
     """Model for logging a browser-based web call"""
     lead_id: str
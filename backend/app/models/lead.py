@@ -51,6 +51,11 @@ class LeadUpdate(BaseModel):
 class LeadResponse(LeadBase):
     """Model for lead responses from API"""
     id: str
+    last_call_id: Optional[str] = None
+    last_call_at: Optional[datetime] = None
+    last_call_status: Optional[str] = None
+    call_count: int = 0
+    last_ai_score: Optional[int] = None
     created_at: datetime
     updated_at: datetime
 
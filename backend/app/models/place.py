@@ -1,5 +1,9 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field, model_validator
+from typing import Literal, Optional
+
+
+# Google Places field-mask tiers, cheapest first (see SearchService)
+PlaceFieldTier = Literal["ids", "basic", "contact", "full"]
 
 
 class PlaceSearchResponse(BaseModel):
@@ -21,3 +25,55 @@ class PlaceDetails(PlaceSearchResponse):
     photos: Optional[list[str]] = None
     reviews: Optional[list[dict]] = None
     user_ratings_total: Optional[int] = None
+
+
+class PlaceSearchGrid(BaseModel):
+    """Bounding box split into rows x cols cells, each searched separately"""
+    south: float = Field(..., ge=-90, le=90)
+    west: float = Field(..., ge=-180, le=180)
+    north: float = Field(..., ge=-90, le=90)
+    east: float = Field(..., ge=-180, le=180)
+    rows: int = Field(4, ge=1, le=20)
+    cols: int = Field(4, ge=1, le=20)
+
+    @model_validator(mode="after")
+    def check_bounds(self) -> "PlaceSearchGrid":
+        if self.south >= self.north or self.west >= self.east:
+            raise ValueError("Grid bounds must satisfy south < north and west < east")
+        return self
+
+
+class PlaceBulkSearchRequest(BaseModel):
+    """Model for a multi-page, multi-location Places search"""
+    query: str = Field(..., min_length=1)
+    locations: Optional[list[str]] = Field(None, max_length=100)
+    grid: Optional[PlaceSearchGrid] = None
+    max_pages: int = Field(3, ge=1, le=3)
+    tier: PlaceFieldTier = "contact"
+
+
+class PlaceDetailsBatchRequest(BaseModel):
+    """Model for fetching details of many places at once"""
+    place_ids: list[str] = Field(..., min_length=1, max_length=100)
+    tier: PlaceFieldTier = "contact"
+
+
+class PlaceImportRequest(BaseModel):
+    """Model for importing Places results as leads
+
+    Either run a search (query with an optional location, locations or grid)
+    or import specific place_ids.
+    """
+    query: Optional[str] = Field(None, min_length=1)
+    location: Optional[str] = None
+    locations: Optional[list[str]] = Field(None, max_length=100)
+    grid: Optional[PlaceSearchGrid] = None
+    max_pages: int = Field(1, ge=1, le=3)
+    place_ids: Optional[list[str]] = Field(None, min_length=1, max_length=100)
+    tags: Optional[list[str]] = None
+
+    @model_validator(mode="after")
+    def check_source(self) -> "PlaceImportRequest":
+        if not self.query and not self.place_ids:
+            raise ValueError("Provide a query or place_ids")
+        return self
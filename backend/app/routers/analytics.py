@@ -0,0 +1,45 @@
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, Query, Depends
+from typing import Literal, Optional
+from app.services.analytics_service import AnalyticsService
+from app.database import supabase
+
+
+router = APIRouter()
+
+
+def get_analytics_service() -> AnalyticsService:
+    """Dependency to get analytics service instance"""
+    return AnalyticsService(supabase)
+
+
+@router.get("/calls")
+async def get_call_series(
+    granularity: Literal["hour", "day"] = Query("day", description="Bucket size"),
+    start: Optional[datetime] = Query(None, description="Inclusive start of the range (ISO 8601)"),
+    end: Optional[datetime] = Query(None, description="Exclusive end of the range (ISO 8601)"),
+    provider: Optional[str] = Query(None, description="Filter by voice provider"),
+    purpose: Optional[str] = Query(None, description="Filter by exact call purpose"),
+    group_by: Literal["none", "provider", "purpose"] = Query("none", description="Split each bucket"),
+    service: AnalyticsService = Depends(get_analytics_service)
+):
+    """Connect rate, duration, cost and AI scores per hour or day, from precomputed rollups"""
+    try:
+        return await service.get_series(granularity, start, end, provider, purpose, group_by)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to load call analytics: {str(e)}")
+
+
+@router.get("/calls/summary")
+async def get_call_summary(
+    start: Optional[datetime] = Query(None, description="Inclusive start of the range (ISO 8601)"),
+    end: Optional[datetime] = Query(None, description="Exclusive end of the range (ISO 8601)"),
+    provider: Optional[str] = Query(None, description="Filter by voice provider"),
+    purpose: Optional[str] = Query(None, description="Filter by exact call purpose"),
+    service: AnalyticsService = Depends(get_analytics_service)
+):
+    """Call metrics totalled over a time range, from precomputed daily rollups"""
+    try:
+        return await service.get_summary(start, end, provider, purpose)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to load call analytics: {str(e)}")
@@ -1,9 +1,26 @@
-from fastapi import APIRouter, HTTPException, Query, Depends
+import hashlib
+from datetime import date
+from fastapi import APIRouter, HTTPException, Query, Depends, Request, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional
-from app.models.call import CallInitiate, CallHistoryResponse, WebCallLog
+from typing import List, Literal, Optional
+from app.models.call import (
+    CallAnalysisBatchRequest,
+    CallAnalysisUpdate,
+    CallInitiate,
+    CallHistoryResponse,
+    CallStatus,
+    CallStatusBatchRequest,
+    WebCallLog,
+)
+from app.services.analysis_service import AnalysisService, get_scorer
+from app.services.archive_service import ArchiveService
+from app.services.call_events import call_events, ALL_CALLS
 from app.services.call_service import CallService
+from app.services.record_cache import invalidate_call
+from app.services.stats_service import StatsService
 from app.adapters.factory import VoiceProviderFactory
+from app.utils.export import EXPORT_MEDIA_TYPES, stream_export
 from app.database import supabase
 
 
@@ -25,8 +42,10 @@ async def initiate_call(
     try:
         result = await service.initiate_call(call_data)
         return result
-    except ValueError as e:
+    except LookupError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to initiate call: {str(e)}")
 
@@ -44,22 +63,99 @@ async def log_web_call(
         raise HTTPException(status_code=500, detail=f"Failed to log call: {str(e)}")
 
 
+@router.post("/status:batch", response_model=List[CallStatus])
+async def get_call_statuses(
+    body: CallStatusBatchRequest,
+    service: CallService = Depends(get_call_service)
+):
+    """Get the status of up to 500 calls in one request"""
+    try:
+        return await service.get_call_statuses(body.ids)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch call statuses: {str(e)}")
+
+
 @router.get("/count")
 async def count_calls(
     status: Optional[str] = Query(None),
 ):
-    """Return total call count"""
+    """Return total call count (served from the cached dashboard summary)"""
     try:
-        from app.database import supabase as db
-        query = db.table("calls").select("id", count="exact")
-        if status:
-            query = query.eq("status", status)
-        result = query.execute()
-        return {"count": result.count or 0}
+        return {"count": await StatsService(supabase).count("calls", status)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to count calls: {str(e)}")
 
 
+@router.get("/search")
+async def search_transcripts(
+    q: str = Query(..., min_length=2, description="Words, \"quoted phrases\", OR and -excluded terms"),
+    skip: int = Query(0, ge=0, description="Number of results to skip"),
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of results to return"),
+    service: CallService = Depends(get_call_service)
+):
+    """Full-text search over finished call transcripts, ranked, with highlighted snippets"""
+    try:
+        return await service.search_transcripts(q, skip, limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to search transcripts: {str(e)}")
+
+
+@router.get("/export")
+async def export_calls(
+    format: Literal["csv", "ndjson"] = Query("csv", description="csv or ndjson"),
+    status: Optional[str] = Query(None),
+    view: str = Query("summary", description="Named projection: summary|full"),
+    fields: Optional[str] = Query(None, description="Comma-separated custom projection, e.g. id,status,lead"),
+    service: CallService = Depends(get_call_service)
+):
+    """Stream every matching call as CSV or NDJSON
+
+    Takes the same filters as GET /. Rows are fetched and written in keyset
+    chunks, so memory use doesn't grow with the size of the export.
+    """
+    chunks = service.iter_calls(status, view, fields)
+    try:
+        first_chunk = await anext(chunks, [])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to export calls: {str(e)}")
+
+    return StreamingResponse(
+        stream_export(first_chunk, chunks, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="calls-{date.today():%Y%m%d}.{format}"'}
+    )
+
+
+# Headers that keep proxies from buffering or caching an SSE stream
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+@router.get("/events")
+async def stream_call_feed():
+    """Server-Sent Events stream of updates for every call
+
+    Each event is named after the webhook event type (call_started,
+    transcript, call_ended, status_update) and carries the change as JSON.
+    """
+    return StreamingResponse(
+        call_events.stream(ALL_CALLS),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
+
+@router.get("/{call_id}/events")
+async def stream_call_events(call_id: str):
+    """Server-Sent Events stream of live updates for one call"""
+    return StreamingResponse(
+        call_events.stream(call_id),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
+
 @router.get("/{call_id}", response_model=CallHistoryResponse)
 async def get_call(
     call_id: str,
@@ -80,37 +176,99 @@ async def update_recording_url(call_id: str, body: RecordingUrlUpdate):
     """Save recording URL to a call record (called by Next.js after fetching from Vapi)"""
     from app.database import supabase as db
     db.table("calls").update({"recording_url": body.recording_url}).eq("id", call_id).execute()
+    invalidate_call(call_id)
     return {"recording_url": body.recording_url}
 
 
-class CallAnalysisUpdate(BaseModel):
-    summary: str
-    ai_score: int
-    qualification: str  # "qualified" | "partial" | "unqualified"
+def get_analysis_service() -> AnalysisService:
+    """Dependency to get analysis service instance"""
+    return AnalysisService(supabase, get_scorer())
+
+
+@router.post("/analysis:run")
+async def analyze_pending_calls(
+    limit: int = Query(50, ge=1, le=500),
+    service: AnalysisService = Depends(get_analysis_service)
+):
+    """Score completed calls that don't have an AI score yet"""
+    try:
+        return await service.analyze_pending(limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to analyze calls: {str(e)}")
+
+
+@router.post("/archive:run")
+async def archive_old_calls(
+    older_than_days: Optional[int] = Query(None, ge=0, description="Defaults to ARCHIVE_AFTER_DAYS"),
+    limit: int = Query(200, ge=1, le=1000)
+):
+    """Compress the transcripts and metadata of calls that ended long ago"""
+    try:
+        return await ArchiveService(supabase).archive_calls(older_than_days, limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to archive calls: {str(e)}")
+
+
+@router.post("/{call_id}/analyze")
+async def analyze_call(
+    call_id: str,
+    service: AnalysisService = Depends(get_analysis_service)
+):
+    """Score one call, reusing the memoized result for an identical transcript"""
+    try:
+        analysis = await service.analyze_call(call_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to analyze call: {str(e)}")
+    if analysis is None:
+        return {"skipped": True, "reason": "Call not found or not enough transcript to analyse"}
+    return analysis
+
+
+@router.patch("/analysis:batch")
+async def update_call_analyses(
+    body: CallAnalysisBatchRequest,
+    service: CallService = Depends(get_call_service)
+):
+    """Save AI-generated scores and summaries for many calls in one statement"""
+    try:
+        updated = await service.update_call_analyses(
+            [analysis.model_dump() for analysis in body.analyses]
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to save analyses: {str(e)}")
+
+    updated_ids = set(updated)
+    return {
+        "updated": len(updated_ids),
+        "missing": [a.id for a in body.analyses if a.id not in updated_ids]
+    }
+
 
 @router.patch("/{call_id}/analysis")
-async def update_call_analysis(call_id: str, body: CallAnalysisUpdate):
+async def update_call_analysis(
+    call_id: str,
+    body: CallAnalysisUpdate,
+    service: CallService = Depends(get_call_service)
+):
     """Save AI-generated score and summary to a call record"""
-    from app.database import supabase as db
-    # Merge ai_score + qualification into the existing metadata JSON
-    existing = db.table("calls").select("metadata").eq("id", call_id).execute()
-    meta = (existing.data[0].get("metadata") or {}) if existing.data else {}
-    meta["ai_score"]      = body.ai_score
-    meta["qualification"] = body.qualification
-    db.table("calls").update({
-        "summary":  body.summary,
-        "metadata": meta,
-    }).eq("id", call_id).execute()
+    updated = await service.update_call_analyses([{"id": call_id, **body.model_dump()}])
+    if not updated:
+        raise HTTPException(status_code=404, detail="Call not found")
     return {"ai_score": body.ai_score, "summary": body.summary, "qualification": body.qualification}
 
 
 @router.get("/lead/{lead_id}")
 async def get_lead_calls(
     lead_id: str,
+    view: str = Query("summary", description="Named projection: summary|full"),
+    fields: Optional[str] = Query(None, description="Comma-separated custom projection, e.g. id,status,lead"),
     service: CallService = Depends(get_call_service)
 ):
     """Get all calls for a specific lead"""
-    calls = await service.get_lead_calls(lead_id)
+    try:
+        calls = await service.get_lead_calls(lead_id, view, fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return calls
 
 
@@ -119,10 +277,26 @@ async def get_all_calls(
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
     status: Optional[str] = Query(None),
+    view: str = Query("summary", description="Named projection: summary|full"),
+    fields: Optional[str] = Query(None, description="Comma-separated custom projection, e.g. id,status,lead"),
+    pagination: Literal["offset", "cursor"] = Query("offset", description="offset (skip/limit) or cursor (keyset)"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; implies pagination=cursor"),
     service: CallService = Depends(get_call_service)
 ):
-    """Get all calls with optional filtering"""
-    calls = await service.get_all_calls(skip, limit, status)
+    """Get all calls with optional filtering
+
+    List rows use the summary projection by default; fetch the full transcript
+    and metadata from GET /{call_id} or /{call_id}/transcript.
+
+    Offset mode returns a list. Cursor mode returns {"items", "next_cursor"}
+    and stays stable under concurrent inserts.
+    """
+    try:
+        if pagination == "cursor" or cursor:
+            return await service.get_calls_page(limit, status, view, fields, cursor)
+        calls = await service.get_all_calls(skip, limit, status, view, fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return calls
 
 
@@ -141,17 +315,38 @@ async def end_call(
 @router.get("/{call_id}/transcript")
 async def get_call_transcript(
     call_id: str,
+    request: Request,
+    response: Response,
+    since: int = Query(-1, ge=-1, description="Only return entries with seq greater than this"),
     service: CallService = Depends(get_call_service)
 ):
-    """Get call transcript"""
-    call = await service.get_call(call_id)
-    if not call:
+    """Get call transcript, optionally only the entries after `since`
+
+    Every entry carries its `seq`; `seq` in the response is the high-water
+    mark to pass as `since` on the next poll. Responses carry an ETag, and a
+    matching If-None-Match returns 304 when nothing new has arrived.
+    """
+    result = await service.get_transcript_since(call_id, since)
+    if result is None:
         raise HTTPException(status_code=404, detail="Call not found")
 
+    # The representation only changes when entries are appended or the
+    # recording arrives; each starting seq is a different representation
+    start = max(since + 1, 0)
+    fingerprint = f"{start}:{result['length']}:{result.get('recording_url') or ''}"
+    etag = f'W/"{hashlib.sha1(fingerprint.encode()).hexdigest()[:16]}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+
     return {
         "call_id": call_id,
-        "transcript": call.get("transcript", []),
-        "recording_url": call.get("recording_url")
+        "transcript": [
+            {**entry, "seq": seq}
+            for seq, entry in enumerate(result["entries"], start=start)
+        ],
+        "seq": result["length"] - 1,
+        "recording_url": result.get("recording_url")
     }
 
 
@@ -1,7 +1,11 @@
+from datetime import date
 from fastapi import APIRouter, HTTPException, Query, Depends
-from typing import List, Optional
+from fastapi.responses import StreamingResponse
+from typing import Literal, Optional
 from app.models.lead import LeadCreate, LeadUpdate, LeadResponse
 from app.services.lead_service import LeadService
+from app.services.stats_service import StatsService
+from app.utils.export import EXPORT_MEDIA_TYPES, stream_export
 from app.database import supabase
 
 
@@ -15,36 +19,87 @@ def get_lead_service() -> LeadService:
 
 @router.get("/count")
 async def count_leads(
-    status: Optional[str] = Query(None),
-    service: LeadService = Depends(get_lead_service)
+    status: Optional[str] = Query(None)
 ):
-    """Return total lead counts"""
+    """Return total lead counts (served from the cached dashboard summary)"""
     try:
-        query = supabase.table("leads").select("id", count="exact")
-        if status:
-            query = query.eq("status", status)
-        result = query.execute()
-        return {"count": result.count or 0}
+        return {"count": await StatsService(supabase).count("leads", status)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to count leads: {str(e)}")
 
 
-@router.get("/", response_model=List[LeadResponse])
+@router.get("/")
 async def get_leads(
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(50, ge=1, le=100, description="Maximum number of records to return"),
     status: Optional[str] = Query(None, description="Filter by status"),
     search: Optional[str] = Query(None, description="Search by name, business, or phone"),
+    view: str = Query("summary", description="Named projection: summary|full"),
+    fields: Optional[str] = Query(None, description="Comma-separated custom projection, e.g. id,name,phone"),
+    pagination: Literal["offset", "cursor"] = Query("offset", description="offset (skip/limit) or cursor (keyset)"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; implies pagination=cursor"),
+    include: Optional[str] = Query(None, description="Extra column groups, e.g. last_call"),
     service: LeadService = Depends(get_lead_service)
 ):
-    """Get all leads with optional filtering and pagination"""
+    """Get all leads with optional filtering and pagination
+
+    Rows use the summary projection (no metadata) by default.
+
+    Offset mode returns a list. Cursor mode returns {"items", "next_cursor"}
+    and stays stable under concurrent inserts.
+    """
     try:
-        leads = await service.get_leads(skip, limit, status, search)
+        if pagination == "cursor" or cursor:
+            return await service.get_leads_page(limit, status, search, view, fields, cursor, include)
+        leads = await service.get_leads(skip, limit, status, search, view, fields, include)
         return leads
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch leads: {str(e)}")
 
 
+@router.get("/export")
+async def export_leads(
+    format: Literal["csv", "ndjson"] = Query("csv", description="csv or ndjson"),
+    status: Optional[str] = Query(None, description="Filter by status"),
+    search: Optional[str] = Query(None, description="Search by name, business, or phone"),
+    view: str = Query("summary", description="Named projection: summary|full"),
+    fields: Optional[str] = Query(None, description="Comma-separated custom projection, e.g. id,name,phone"),
+    include: Optional[str] = Query(None, description="Extra column groups, e.g. last_call"),
+    service: LeadService = Depends(get_lead_service)
+):
+    """Stream every matching lead as CSV or NDJSON
+
+    Takes the same filters as GET /. Rows are fetched and written in chunks,
+    so memory use doesn't grow with the size of the export.
+    """
+    chunks = service.iter_leads(status, search, view, fields, include)
+    try:
+        first_chunk = await anext(chunks, [])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to export leads: {str(e)}")
+
+    return StreamingResponse(
+        stream_export(first_chunk, chunks, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="leads-{date.today():%Y%m%d}.{format}"'}
+    )
+
+
+@router.post("/phones:normalize")
+async def normalize_lead_phones(
+    service: LeadService = Depends(get_lead_service)
+):
+    """Fill in phone_e164 for leads that predate it, using PHONE_DEFAULT_COUNTRY_CODE"""
+    try:
+        return {"updated": await service.backfill_phone_e164()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to normalize phone numbers: {str(e)}")
+
+
 @router.get("/{lead_id}", response_model=LeadResponse)
 async def get_lead(
     lead_id: str,
@@ -1,7 +1,18 @@
+import json
 from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from typing import List
-from app.models.place import PlaceSearchResponse
-from app.services.search_service import SearchService
+from app.models.place import (
+    PlaceBulkSearchRequest,
+    PlaceDetails,
+    PlaceDetailsBatchRequest,
+    PlaceFieldTier,
+    PlaceImportRequest,
+    PlaceSearchResponse,
+)
+from app.services.lead_service import LeadService
+from app.services.search_service import SearchService, place_to_lead
+from app.database import supabase
 
 
 router = APIRouter()
@@ -10,12 +21,13 @@ router = APIRouter()
 @router.get("/places", response_model=List[PlaceSearchResponse])
 async def search_places(
     query: str = Query(..., min_length=1, description="Search query"),
-    location: str = Query(None, description="Location to search near")
+    location: str = Query(None, description="Location to search near"),
+    tier: PlaceFieldTier = Query("contact", description="Field tier: ids|basic|contact|full")
 ):
     """Search for businesses using Google Places API"""
     try:
         service = SearchService()
-        results = await service.search_places(query, location)
+        results = await service.search_places(query, location, tier)
         return results
     except Exception as e:
         raise HTTPException(
@@ -24,15 +36,96 @@ async def search_places(
         )
 
 
-@router.get("/places/{place_id}", response_model=PlaceSearchResponse)
-async def get_place_details(place_id: str):
-    """Get detailed information about a specific place"""
+@router.post("/places:bulk")
+async def bulk_search_places(request: PlaceBulkSearchRequest):
+    """Search one query over many locations or a lat/lng grid, following every page
+
+    Streams NDJSON, one PlaceSearchResponse per line, deduplicated by
+    place_id as results arrive.
+    """
+    service = SearchService()
+    places = service.search_places_bulk(
+        request.query, request.locations, request.grid, request.max_pages, request.tier
+    )
+    return StreamingResponse(
+        (place.model_dump_json() + "\n" async for place in places),
+        media_type="application/x-ndjson"
+    )
+
+
+@router.post("/places/details:batch")
+async def get_place_details_batch(request: PlaceDetailsBatchRequest):
+    """Get details for up to 100 places concurrently
+
+    Streams NDJSON in completion order: {"place_id", "place"} per success,
+    {"place_id", "error"} per failure. Cached places are returned first.
+    """
+    service = SearchService()
+    results = service.get_place_details_batch(request.place_ids, request.tier)
+    return StreamingResponse(
+        (json.dumps(result) + "\n" async for result in results),
+        media_type="application/x-ndjson"
+    )
+
+
+@router.get("/places/{place_id}", response_model=PlaceDetails)
+async def get_place_details(
+    place_id: str,
+    tier: PlaceFieldTier = Query("contact", description="Field tier: ids|basic|contact|full")
+):
+    """Get detailed information about a specific place
+
+    Fields a previous search already returned are served from the cache;
+    only missing fields are requested from Google.
+    """
     try:
         service = SearchService()
-        place = await service.get_place_details(place_id)
+        place = await service.get_place_details(place_id, tier)
         return place
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Failed to get place details: {str(e)}"
         )
+
+
+@router.post("/places/import")
+async def import_places(request: PlaceImportRequest):
+    """Search Google Places (or fetch place_ids) and add the results as leads in one request
+
+    Places without a phone number are left out, and places already in the
+    leads table (same google_place_id or phone) are skipped.
+    """
+    service = SearchService()
+    try:
+        if request.place_ids:
+            places = [
+                PlaceSearchResponse(**result["place"])
+                # Leads need a phone number, which is in the contact tier
+                async for result in service.get_place_details_batch(request.place_ids, "contact")
+                if "place" in result
+            ]
+        else:
+            locations = request.locations or ([request.location] if request.location else None)
+            places = [
+                place async for place in service.search_places_bulk(
+                    request.query, locations, request.grid, request.max_pages, "contact"
+                )
+            ]
+
+        leads = [place_to_lead(place, request.tags) for place in places if place.phone]
+        results = await LeadService(supabase).bulk_insert_leads(leads)
+
+        return {
+            "found": len(places),
+            "without_phone": len(places) - len(leads),
+            "successful": results["successful"],
+            "failed": results["failed"],
+            "skipped": results["skipped"],
+            "errors": results["errors"][:10]
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to import places: {str(e)}"
+        )
@@ -0,0 +1,36 @@
+from fastapi import APIRouter, HTTPException, Depends
+from app.services.call_events import call_events
+from app.services.places_cache import cache_stats as places_cache_stats
+from app.services.record_cache import cache_stats
+from app.services.search_service import places_transport_stats
+from app.services.stats_service import StatsService
+from app.database import supabase
+
+
+router = APIRouter()
+
+
+def get_stats_service() -> StatsService:
+    """Dependency to get stats service instance"""
+    return StatsService(supabase)
+
+
+@router.get("/summary")
+async def get_summary(service: StatsService = Depends(get_stats_service)):
+    """Lead and call counts grouped by status, in one cached response"""
+    try:
+        return await service.get_summary()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to load summary: {str(e)}")
+
+
+@router.get("/cache")
+async def get_cache_stats(service: StatsService = Depends(get_stats_service)):
+    """Hit/miss metrics for the summary, lead, call and Google Places caches"""
+    return {"summary": service.cache_stats(), **cache_stats(), "places": {**places_cache_stats(), "transport": places_transport_stats()}}
+
+
+@router.get("/events")
+async def get_event_stats():
+    """Subscriber and delivery counters for the live call event hub"""
+    return call_events.stats()
@@ -0,0 +1,348 @@
+import asyncio
+import json
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+import httpx
+from supabase import Client
+from app.adapters.factory import VoiceProviderFactory
+from app.config import settings
+from app.models.call import CallAnalysisUpdate
+from app.services.archive_service import rehydrate_call
+from app.services.call_service import CallService
+from app.services.record_cache import invalidate_call
+from app.utils.transcript import conversation_messages, conversation_text, transcript_hash
+
+
+class CallScorer(ABC):
+    """Abstract base class for call scorers
+
+    A scorer turns a call's purpose and transcript into a score, summary and
+    qualification. Implementations are selected by the ANALYSIS_SCORER setting.
+
+    `name` and `version` are part of the memo key, so results are never
+    reused across scorers; bump `version` when the scoring logic or prompt
+    changes.
+    """
+
+    name: str = ""
+    version: str = "1"
+
+    @property
+    def cache_id(self) -> str:
+        """Identifies this scorer and version in memo keys"""
+        return f"{self.name}:{self.version}"
+
+    @abstractmethod
+    async def score(
+        self,
+        purpose: str,
+        transcript: List[Dict[str, Any]]
+    ) -> CallAnalysisUpdate:
+        """Score one call
+
+        Args:
+            purpose: Purpose the call was made for
+            transcript: Compact transcript entries
+
+        Returns:
+            CallAnalysisUpdate with summary, ai_score (0-100) and qualification
+        """
+        pass
+
+
+def _qualification_for(score: int) -> str:
+    """Map a score to a qualification bucket"""
+    if score >= 70:
+        return "qualified"
+    if score >= 40:
+        return "partial"
+    return "unqualified"
+
+
+class StubScorer(CallScorer):
+    """Deterministic local scorer for development and load tests
+
+    Scores on conversation length alone, so no API key or network is needed.
+    """
+
+    name = "stub"
+
+    async def score(
+        self,
+        purpose: str,
+        transcript: List[Dict[str, Any]]
+    ) -> CallAnalysisUpdate:
+        """Score a call from the number of user turns"""
+        messages = conversation_messages(transcript)
+        user_turns = sum(1 for m in messages if m["role"] == "user")
+        score = min(100, 20 + user_turns * 10)
+
+        return CallAnalysisUpdate(
+            summary=f"{len(messages)} messages exchanged about: {purpose}",
+            ai_score=score,
+            qualification=_qualification_for(score)
+        )
+
+
+class GeminiScorer(CallScorer):
+    """Google Gemini scorer, using the same prompt as the frontend analyze route"""
+
+    def __init__(self):
+        self.name = f"gemini/{settings.gemini_model}"
+        self.api_key = settings.gemini_api_key
+        self.url = (
+            "https://generativelanguage.googleapis.com/v1beta/models/"
+            f"{settings.gemini_model}:generateContent"
+        )
+
+    def _build_prompt(self, purpose: str, transcript: List[Dict[str, Any]]) -> str:
+        """Build the scoring prompt"""
+        return f"""You are a call quality analyser. Analyse this AI voice call transcript and respond with ONLY a valid JSON object — no markdown, no code blocks, no extra text.
+
+Call Purpose: {purpose}
+
+Transcript:
+{conversation_text(transcript)}
+
+Respond with exactly this JSON:
+{{
+  "score": <integer 0-100>,
+  "summary": "<2-3 sentence summary of what was discussed and the outcome>",
+  "qualification": "<exactly one of: qualified, partial, unqualified>"
+}}
+
+Scoring:
+- 80-100: Purpose fully achieved, lead engaged and interested
+- 60-79: Good conversation, some interest shown
+- 40-59: Partial engagement, purpose not fully met
+- 20-39: Minimal engagement
+- 0-19: No real conversation or call failed"""
+
+    async def score(
+        self,
+        purpose: str,
+        transcript: List[Dict[str, Any]]
+    ) -> CallAnalysisUpdate:
+        """Score a call with Gemini"""
+        if not self.api_key:
+            raise ValueError("GEMINI_API_KEY not configured")
+
+        async with httpx.AsyncClient() as client:
+            response = await client.post(
+                self.url,
+                params={"key": self.api_key},
+                json={
+                    "contents": [{"parts": [{"text": self._build_prompt(purpose, transcript)}]}],
+                    "generationConfig": {"temperature": 0.1, "maxOutputTokens": 256},
+                },
+                timeout=30.0
+            )
+            response.raise_for_status()
+            data = response.json()
+
+        raw_text = (
+            data.get("candidates", [{}])[0]
+            .get("content", {})
+            .get("parts", [{}])[0]
+            .get("text", "")
+        ).strip()
+
+        # Strip markdown code fences if Gemini wraps the JSON anyway
+        if raw_text.startswith("```"):
+            raw_text = raw_text.split("\n", 1)[-1].rsplit("```", 1)[0].strip()
+
+        parsed = json.loads(raw_text)
+        score = min(100, max(0, round(float(parsed.get("score") or 0))))
+        qualification = parsed.get("qualification")
+        if qualification not in ("qualified", "partial", "unqualified"):
+            qualification = _qualification_for(score)
+
+        return CallAnalysisUpdate(
+            summary=str(parsed.get("summary") or "").strip(),
+            ai_score=score,
+            qualification=qualification
+        )
+
+
+def get_scorer() -> CallScorer:
+    """Get the scorer selected by the ANALYSIS_SCORER setting
+
+    Raises:
+        ValueError: If the scorer is unknown
+    """
+    scorer_name = settings.analysis_scorer.lower()
+
+    if scorer_name == "stub":
+        return StubScorer()
+    elif scorer_name == "gemini":
+        return GeminiScorer()
+    else:
+        raise ValueError(
+            f"Unknown analysis scorer: {scorer_name}. "
+            f"Supported scorers: 'stub', 'gemini'"
+        )
+
+
+class AnalysisService:
+    """Service that scores completed calls in the background
+
+    Results are memoized by transcript content hash (and scorer) in the
+    analysis_cache table, so identical or re-requested transcripts are never
+    scored twice by the same scorer.
+    """
+
+    def __init__(self, supabase: Client, scorer: CallScorer):
+        self.db = supabase
+        self.scorer = scorer
+        self.cache_table = "analysis_cache"
+        self.concurrency = settings.analysis_concurrency
+
+    async def analyze_pending(self, limit: Optional[int] = None) -> Dict[str, int]:
+        """Score completed calls that don't have an AI score yet
+
+        Calls already marked skipped, or failed ANALYSIS_MAX_ATTEMPTS times,
+        are left out, so they can't crowd scorable calls out of the batch.
+
+        Returns:
+            Counts of calls found, scored by the scorer, served from the memo,
+            skipped (too little conversation) and failed
+        """
+        response = self.db.table("calls").select("id, purpose, transcript").in_(
+            "status", ["completed", "ended"]
+        ).is_("metadata->ai_score", "null").is_("archived_at", "null").or_(
+            "metadata->>analysis_status.is.null,metadata->>analysis_status.eq.failed"
+        ).order("end_time", desc=True).limit(
+            limit or settings.analysis_batch_size
+        ).execute()
+
+        counts, _ = await self._analyze(response.data or [])
+        return counts
+
+    async def analyze_call(self, call_id: str) -> Optional[Dict[str, Any]]:
+        """Score a single call, reusing a memoized result when the transcript is known
+
+        Returns:
+            The saved analysis, or None if the call doesn't exist or has too
+            little conversation to score
+        """
+        response = self.db.table("calls").select(
+            "id, purpose, transcript, transcript_archive, archive_codec"
+        ).eq("id", call_id).execute()
+        if not response.data:
+            return None
+
+        # Archived calls keep an empty hot transcript; score the archived one
+        _, analyses = await self._analyze([rehydrate_call(response.data[0])])
+        return analyses[0] if analyses else None
+
+    async def _analyze(
+        self,
+        calls: List[Dict[str, Any]]
+    ) -> Tuple[Dict[str, int], List[Dict[str, Any]]]:
+        """Score calls (rows with id, purpose, transcript) and save the results in one batch
+
+        Returns:
+            (counts, saved analyses as {id, summary, ai_score, qualification})
+        """
+        counts = {"found": len(calls), "scored": 0, "memoized": 0, "skipped": 0, "failed": 0}
+        skipped_ids: List[str] = []
+        failed_ids: List[str] = []
+
+        # Group calls by content hash so each distinct transcript is scored at most once
+        by_hash: Dict[str, List[Dict[str, Any]]] = {}
+        for call in calls:
+            transcript = call.get("transcript") or []
+            if len(conversation_messages(transcript)) < 2:
+                counts["skipped"] += 1
+                skipped_ids.append(call["id"])
+                continue
+            key = transcript_hash(transcript, call.get("purpose") or "", self.scorer.cache_id)
+            by_hash.setdefault(key, []).append(call)
+
+        if not by_hash:
+            self._mark(skipped_ids, "skipped")
+            return counts, []
+
+        memo = self._load_memo(list(by_hash))
+        to_score = [key for key in by_hash if key not in memo]
+        counts["memoized"] = sum(len(by_hash[key]) for key in memo if key in by_hash)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def score_one(key: str) -> None:
+            call = by_hash[key][0]
+            async with semaphore:
+                try:
+                    analysis = await self.scorer.score(
+                        call.get("purpose") or "General inquiry",
+                        call.get("transcript") or []
+                    )
+                except Exception as e:
+                    print(f"Analysis failed for call {call['id']}: {e}")
+                    counts["failed"] += len(by_hash[key])
+                    failed_ids.extend(c["id"] for c in by_hash[key])
+                    return
+            memo[key] = analysis.model_dump()
+            counts["scored"] += len(by_hash[key])
+
+        await asyncio.gather(*(score_one(key) for key in to_score))
+        self._mark(skipped_ids, "skipped")
+        self._mark(failed_ids, "failed")
+
+        new_results = [
+            {"transcript_hash": key, **memo[key]}
+            for key in to_score if key in memo
+        ]
+        if new_results:
+            self.db.table(self.cache_table).upsert(new_results).execute()
+
+        analyses = [
+            {"id": call["id"], **memo[key]}
+            for key, group in by_hash.items() if key in memo
+            for call in group
+        ]
+        if analyses:
+            call_service = CallService(self.db, VoiceProviderFactory.get_provider())
+            await call_service.update_call_analyses(analyses)
+
+        return counts, analyses
+
+    def _mark(self, call_ids: List[str], status: str) -> None:
+        """Record a skipped or failed analysis attempt in each call's metadata"""
+        if not call_ids:
+            return
+
+        self.db.rpc("mark_call_analysis", {
+            "p_call_ids": call_ids,
+            "p_status": status,
+            "p_max_attempts": settings.analysis_max_attempts,
+        }).execute()
+        for call_id in call_ids:
+            invalidate_call(call_id)
+
+    def _load_memo(self, hashes: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Load memoized analyses for the given transcript hashes"""
+        if not hashes:
+            return {}
+
+        response = self.db.table(self.cache_table).select(
+            "transcript_hash, summary, ai_score, qualification"
+        ).in_("transcript_hash", hashes).execute()
+
+        return {
+            row.pop("transcript_hash"): row
+            for row in response.data or []
+        }
+
+
+async def run_analysis_worker(supabase: Client) -> None:
+    """Periodically score pending calls until cancelled"""
+    service = AnalysisService(supabase, get_scorer())
+    while True:
+        try:
+            counts = await service.analyze_pending()
+            if counts["found"]:
+                print(f"Call analysis: {counts}")
+        except Exception as e:
+            print(f"Call analysis worker error: {e}")
+        await asyncio.sleep(settings.analysis_interval_seconds)
@@ -0,0 +1,113 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from supabase import Client
+
+
+# Additive measures returned by call_rollup_series()
+ROLLUP_MEASURES = (
+    "calls", "connected", "qualified", "duration_seconds", "cost",
+    "scored", "ai_score_sum",
+)
+
+
+def _with_rates(bucket: Dict[str, Any]) -> Dict[str, Any]:
+    """Add derived metrics to a bucket of additive measures"""
+    calls = bucket["calls"]
+    connected = bucket["connected"]
+    qualified = bucket["qualified"]
+    scored = bucket["scored"]
+    cost = float(bucket["cost"] or 0)
+
+    bucket["cost"] = round(cost, 4)
+    bucket["connect_rate"] = round(connected / calls, 4) if calls else None
+    bucket["avg_duration_seconds"] = (
+        round(bucket["duration_seconds"] / connected, 1) if connected else None
+    )
+    bucket["avg_ai_score"] = round(bucket["ai_score_sum"] / scored, 1) if scored else None
+    bucket["cost_per_qualified"] = round(cost / qualified, 4) if qualified else None
+    return bucket
+
+
+class AnalyticsService:
+    """Service for call analytics
+
+    Reads precomputed hourly/daily buckets from the call_rollups table, which
+    record_calls() keeps up to date incrementally after every call write, so
+    no request scans the calls table.
+    """
+
+    def __init__(self, supabase: Client):
+        self.db = supabase
+
+    async def record_calls(self, call_ids: List[str]) -> int:
+        """Fold the current state of the given calls into the rollups
+
+        Idempotent: each call retracts the values it was last counted with
+        before adding its current ones, so it is safe to call after any write.
+
+        Returns:
+            Number of calls whose contribution changed
+        """
+        if not call_ids:
+            return 0
+
+        response = self.db.rpc("record_call_rollups", {"p_call_ids": call_ids}).execute()
+        return response.data or 0
+
+    async def get_series(
+        self,
+        granularity: str = "day",
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        provider: Optional[str] = None,
+        purpose: Optional[str] = None,
+        group_by: str = "none"
+    ) -> List[Dict[str, Any]]:
+        """Get call metrics per hour or day, optionally split by provider or purpose
+
+        Each bucket has the additive measures (calls, connected, qualified,
+        duration_seconds, cost, scored, ai_score_sum), calls by status, an
+        ai_score histogram by decile and the derived rates.
+        """
+        response = self.db.rpc("call_rollup_series", {
+            "p_granularity": granularity,
+            "p_from": start.isoformat() if start else None,
+            "p_to": end.isoformat() if end else None,
+            "p_provider": provider,
+            "p_purpose": purpose,
+            "p_group_by": group_by,
+        }).execute()
+
+        series = []
+        for row in response.data or []:
+            if group_by == "none":
+                row.pop("group_key", None)
+            else:
+                row[group_by] = row.pop("group_key", None)
+            series.append(_with_rates(row))
+        return series
+
+    async def get_summary(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        provider: Optional[str] = None,
+        purpose: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Get call metrics totalled over a time range (daily buckets)"""
+        buckets = await self.get_series("day", start, end, provider, purpose)
+
+        summary: Dict[str, Any] = {measure: 0 for measure in ROLLUP_MEASURES}
+        by_status: Dict[str, int] = {}
+        histogram: Dict[str, int] = {}
+        for bucket in buckets:
+            for measure in ROLLUP_MEASURES:
+                summary[measure] += bucket[measure] or 0
+            for status, n in (bucket.get("by_status") or {}).items():
+                by_status[status] = by_status.get(status, 0) + n
+            for decile, n in (bucket.get("score_histogram") or {}).items():
+                histogram[decile] = histogram.get(decile, 0) + n
+
+        summary["by_status"] = by_status
+        summary["score_histogram"] = histogram
+        return _with_rates(summary)
@@ -0,0 +1,104 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+from supabase import Client
+from app.config import settings
+from app.services.record_cache import invalidate_call
+from app.utils.compression import (
+    bytea_to_bytes,
+    bytes_to_bytea,
+    compress_json,
+    decompress_json,
+)
+
+
+# Metadata keys that stay on the hot row after archival, because list views,
+# analytics rollups and the analysis queue read them
+HOT_METADATA_KEYS = ("ai_score", "qualification", "call_type", "language")
+
+
+def rehydrate_call(call: Dict[str, Any]) -> Dict[str, Any]:
+    """Restore an archived call's transcript and metadata in place
+
+    Drops the archive columns from the row, so callers see the same shape
+    for hot and archived calls. Hot metadata wins over archived metadata,
+    since it may have been updated after archival.
+    """
+    archive = call.pop("transcript_archive", None)
+    codec = call.pop("archive_codec", None)
+    if not archive:
+        return call
+
+    archived = decompress_json(codec, bytea_to_bytes(archive))
+    call["transcript"] = archived.get("transcript") or []
+    call["metadata"] = {**(archived.get("metadata") or {}), **(call.get("metadata") or {})}
+    return call
+
+
+class ArchiveService:
+    """Service that moves old calls' transcripts and metadata to cold storage
+
+    The transcript and full metadata are compressed (zstd, or zlib when
+    zstandard isn't installed) into the calls.transcript_archive bytea
+    column, leaving an empty transcript and the HOT_METADATA_KEYS behind.
+    CallService.get_call and the transcript endpoint rehydrate them.
+    """
+
+    def __init__(self, supabase: Client):
+        self.db = supabase
+        self.table_name = "calls"
+
+    async def archive_calls(
+        self,
+        older_than_days: Optional[int] = None,
+        limit: Optional[int] = None
+    ) -> Dict[str, int]:
+        """Archive calls that ended more than `older_than_days` ago
+
+        Returns:
+            Counts of calls archived, and the JSON and compressed sizes in bytes
+        """
+        days = settings.archive_after_days if older_than_days is None else older_than_days
+        cutoff = (datetime.utcnow() - timedelta(days=days)).isoformat()
+
+        response = self.db.table(self.table_name).select(
+            "id, transcript, metadata"
+        ).is_("archived_at", "null").lt("end_time", cutoff).order("end_time").limit(
+            limit or settings.archive_batch_size
+        ).execute()
+
+        counts = {"archived": 0, "raw_bytes": 0, "compressed_bytes": 0}
+        for call in response.data or []:
+            metadata = call.get("metadata") or {}
+            payload = {"transcript": call.get("transcript") or [], "metadata": metadata}
+            codec, data = compress_json(payload)
+
+            updated = self.db.table(self.table_name).update({
+                "transcript": [],
+                "metadata": {k: metadata[k] for k in HOT_METADATA_KEYS if k in metadata},
+                "transcript_archive": bytes_to_bytea(data),
+                "archive_codec": codec,
+                "archived_at": datetime.utcnow().isoformat(),
+            }).eq("id", call["id"]).is_("archived_at", "null").execute()
+
+            if updated.data:
+                invalidate_call(call["id"])
+                counts["archived"] += 1
+                counts["raw_bytes"] += len(json.dumps(payload, separators=(",", ":"), default=str))
+                counts["compressed_bytes"] += len(data)
+
+        return counts
+
+
+async def run_archive_worker(supabase: Client) -> None:
+    """Periodically archive old calls until cancelled"""
+    service = ArchiveService(supabase)
+    while True:
+        try:
+            counts = await service.archive_calls()
+            if counts["archived"]:
+                print(f"Call archival: {counts}")
+        except Exception as e:
+            print(f"Call archive worker error: {e}")
+        await asyncio.sleep(settings.archive_interval_seconds)
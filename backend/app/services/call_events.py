@@ -0,0 +1,91 @@
+import asyncio
+import json
+from collections import defaultdict
+from typing import Any, AsyncIterator, Dict, Set
+
+
+# Topic that receives every call's events (the global call feed)
+ALL_CALLS = "*"
+
+
+class CallEventHub:
+    """In-process pub/sub hub for live call updates
+
+    WebhookService publishes one event per processed webhook; it is encoded
+    once as a Server-Sent Events frame and fanned out to every subscriber of
+    that call and of the global feed, so viewers add no database reads.
+
+    Each subscriber has a bounded queue. A subscriber that falls behind loses
+    its oldest frames rather than slowing down the publisher.
+
+    The hub lives in this process only: run a single worker, or put a shared
+    broker in front, if webhooks and viewers may land on different workers.
+    """
+
+    def __init__(self, queue_size: int = 256):
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self, topic: str) -> asyncio.Queue:
+        """Register a new subscriber queue for a call id or ALL_CALLS"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers[topic].add(queue)
+        return queue
+
+    def unsubscribe(self, topic: str, queue: asyncio.Queue) -> None:
+        """Remove a subscriber queue"""
+        subscribers = self._subscribers.get(topic)
+        if subscribers is None:
+            return
+        subscribers.discard(queue)
+        if not subscribers:
+            del self._subscribers[topic]
+
+    def publish(self, call_id: str, event_type: str, data: Dict[str, Any]) -> None:
+        """Fan an event out to the call's subscribers and the global feed"""
+        message = {"type": event_type, "call_id": call_id, **data}
+        frame = f"event: {event_type}\ndata: {json.dumps(message, default=str)}\n\n"
+        self.published += 1
+
+        for topic in (call_id, ALL_CALLS):
+            for queue in self._subscribers.get(topic, ()):
+                if queue.full():
+                    # Slow consumer: drop its oldest frame to make room
+                    queue.get_nowait()
+                    self.dropped += 1
+                queue.put_nowait(frame)
+
+    async def stream(
+        self,
+        topic: str,
+        keepalive_seconds: float = 15.0
+    ) -> AsyncIterator[str]:
+        """Yield SSE frames for a topic until the consumer stops iterating
+
+        A comment frame is sent after `keepalive_seconds` of silence so proxies
+        keep the connection open and disconnected clients are detected.
+        """
+        queue = self.subscribe(topic)
+        try:
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), keepalive_seconds)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+        finally:
+            self.unsubscribe(topic, queue)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return subscriber and delivery counters"""
+        return {
+            "topics": len(self._subscribers),
+            "subscribers": sum(len(s) for s in self._subscribers.values()),
+            "published": self.published,
+            "dropped": self.dropped,
+        }
+
+
+# Shared hub instance
+call_events = CallEventHub()
@@ -1,8 +1,66 @@
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, AsyncIterator, Awaitable, List
 from datetime import datetime
 from supabase import Client
 from app.adapters.base import VoiceProviderAdapter, CallRequest
+from app.config import settings
 from app.models.call import CallInitiate
+from app.services.analytics_service import AnalyticsService
+from app.services.archive_service import rehydrate_call
+from app.services.lead_service import LeadService
+from app.services.record_cache import (
+    call_cache,
+    invalidate_call,
+    invalidate_lead,
+)
+from app.services.stats_service import invalidate_summary
+from app.utils.pagination import keyset_filter, keyset_page
+from app.utils.phone import to_e164
+from app.utils.projection import build_projection
+
+
+async def record_side_effect(description: str, write: Awaitable[Any]) -> None:
+    """Await a bookkeeping write (lead summary, rollups) without failing the request
+
+    The call has already been placed or saved by then, so an error here
+    must not turn into a 500 that a client would retry (dialing twice, or
+    re-sending a webhook or analysis that was already applied).
+    It is logged; rollups are resynced by rebuild_call_rollups() and the
+    lead summary by the call's next update.
+    """
+    try:
+        await write
+    except Exception as e:
+        print(f"Failed to {description}: {e}")
+
+
+# Columns a client may request through `fields=` on list endpoints
+CALL_COLUMNS = (
+    "id", "lead_id", "provider", "provider_call_id", "direction", "status",
+    "purpose", "start_time", "end_time", "duration_seconds", "transcript",
+    "recording_url", "summary", "metadata", "cost", "created_at", "updated_at",
+    "archived_at",
+)
+
+# Minimal embedded lead for list views
+CALL_EMBEDS = {
+    "lead": "leads(id, name, business_name, phone)",
+    "leads": "leads(id, name, business_name, phone)",
+}
+
+# Named projections for list endpoints. Transcript and full metadata are
+# only returned by get_call / the transcript endpoint. "full" lists columns
+# rather than "*" so the compressed archive is never sent to list clients.
+CALL_PROJECTIONS = {
+    "summary": (
+        "id, lead_id, provider, provider_call_id, direction, status, purpose, "
+        "start_time, end_time, duration_seconds, recording_url, summary, cost, "
+        "created_at, updated_at, "
+        "ai_score:metadata->ai_score, qualification:metadata->>qualification, "
+        "call_type:metadata->>call_type, "
+        "leads(id, name, business_name, phone)"
+    ),
+    "full": ", ".join(CALL_COLUMNS) + ", leads(*)",
+}
 
 
 class CallService:
@@ -14,18 +72,26 @@ class CallService:
         self.table_name = "calls"
 
     async def initiate_call(self, call_data: CallInitiate) -> Dict[str, Any]:
-        """Initiate a new AI call to a lead"""
+        """Initiate a new AI call to a lead
+
+        Raises:
+            LookupError: If the lead doesn't exist
+            ValueError: If the lead's phone number isn't a valid number
+        """
         # Verify lead exists and get phone number
-        lead = self.db.table("leads").select("*").eq("id", call_data.lead_id).execute()
+        lead_data = await LeadService(self.db).get_lead(call_data.lead_id)
 
-        if not lead.data:
-            raise ValueError(f"Lead not found: {call_data.lead_id}")
+        if not lead_data:
+            raise LookupError(f"Lead not found: {call_data.lead_id}")
 
-        lead_data = lead.data[0]
+        # Providers dial E.164 numbers
+        to_number = lead_data.get("phone_e164") or to_e164(lead_data["phone"])
+        if not to_number:
+            raise ValueError(f"Lead has no valid phone number: {lead_data['phone']}")
 
         # Create call request
         request = CallRequest(
-            to_number=lead_data["phone"],
+            to_number=to_number,
             purpose=call_data.purpose,
             lead_id=call_data.lead_id,
             metadata=call_data.metadata
@@ -46,6 +112,16 @@ class CallService:
         }
 
         db_response = self.db.table(self.table_name).insert(call_record).execute()
+        invalidate_summary()
+        await record_side_effect("record call on lead", LeadService(self.db).record_call(
+            call_data.lead_id,
+            db_response.data[0]["id"],
+            call_record["start_time"],
+            call_record["status"]
+        ))
+        await record_side_effect(
+            "record call rollups", AnalyticsService(self.db).record_calls([db_response.data[0]["id"]])
+        )
 
         return {
             "id": db_response.data[0]["id"],
@@ -56,38 +132,201 @@ class CallService:
         }
 
     async def get_call(self, call_id: str) -> Optional[Dict[str, Any]]:
-        """Get call details by ID"""
+        """Get call details by ID (read-through cached, archived calls rehydrated)"""
+        call = call_cache.get(call_id)
+        if call is not None:
+            return call
+
         response = self.db.table(self.table_name).select(
             "*, leads(*)"
         ).eq("id", call_id).execute()
 
-        return response.data[0] if response.data else None
+        if not response.data:
+            return None
+
+        call = rehydrate_call(response.data[0])
+        call_cache.set(call_id, call)
+        return call
+
+    async def get_call_statuses(self, call_ids: List[str]) -> List[Dict[str, Any]]:
+        """Get compact {id, status, duration_seconds, updated_at} rows for many calls
+
+        Cached calls are answered from the call cache; the rest are fetched in
+        a single `in` query. Unknown ids are omitted and order follows call_ids.
+        """
+        status_fields = ("id", "status", "duration_seconds", "updated_at")
+        found: Dict[str, Dict[str, Any]] = {}
+        missing = []
+
+        for call_id in dict.fromkeys(call_ids):
+            call = call_cache.get(call_id)
+            if call is not None:
+                found[call_id] = {field: call.get(field) for field in status_fields}
+            else:
+                missing.append(call_id)
+
+        if missing:
+            response = self.db.table(self.table_name).select(
+                ", ".join(status_fields)
+            ).in_("id", missing).execute()
+            for row in response.data or []:
+                found[row["id"]] = row
+
+        return [found[call_id] for call_id in dict.fromkeys(call_ids) if call_id in found]
 
-    async def get_lead_calls(self, lead_id: str) -> List[Dict[str, Any]]:
+    async def get_transcript_since(
+        self,
+        call_id: str,
+        since: int = -1
+    ) -> Optional[Dict[str, Any]]:
+        """Get the transcript entries after sequence number `since`
+
+        An entry's sequence number is its position in the transcript, so
+        since=-1 returns everything. Serves from the call cache when the call
+        is cached, otherwise slices the transcript inside the database.
+        Archived calls are rehydrated through get_call.
+
+        Returns:
+            {"entries": [...], "length": int, "recording_url": str | None},
+            or None if the call does not exist
+        """
+        call = call_cache.get(call_id)
+        if call is not None:
+            transcript = call.get("transcript") or []
+            return {
+                "entries": transcript[since + 1:],
+                "length": len(transcript),
+                "recording_url": call.get("recording_url"),
+            }
+
+        response = self.db.rpc("call_transcript_since", {
+            "p_call_id": call_id,
+            "p_since": since,
+        }).execute()
+
+        data = response.data or None
+        if data and data.pop("archived", False):
+            call = await self.get_call(call_id)
+            transcript = call.get("transcript") or []
+            return {
+                "entries": transcript[since + 1:],
+                "length": len(transcript),
+                "recording_url": call.get("recording_url"),
+            }
+
+        return data
+
+    async def search_transcripts(
+        self,
+        query: str,
+        skip: int = 0,
+        limit: int = 20
+    ) -> List[Dict[str, Any]]:
+        """Search finished calls' transcripts, best matches first
+
+        Runs the search_call_transcripts database function over the GIN
+        indexed call_transcript_index table. Each result carries the call's
+        summary columns, the lead's name, a rank and a snippet with matches
+        wrapped in <mark> tags.
+        """
+        response = self.db.rpc("search_call_transcripts", {
+            "search_query": query,
+            "result_limit": limit,
+            "result_offset": skip,
+        }).execute()
+
+        return response.data if response.data else []
+
+    async def get_lead_calls(
+        self,
+        lead_id: str,
+        view: str = "summary",
+        fields: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
         """Get all calls for a specific lead"""
-        response = self.db.table(self.table_name).select("*").eq(
+        projection = build_projection(fields, CALL_PROJECTIONS, CALL_COLUMNS, CALL_EMBEDS, view)
+        response = self.db.table(self.table_name).select(projection).eq(
             "lead_id", lead_id
         ).order("start_time", desc=True).execute()
 
         return response.data if response.data else []
 
+    def _list_query(self, projection: str, status: Optional[str] = None):
+        """Build the filtered, ordered list query shared by offset and cursor paging"""
+        query = self.db.table(self.table_name).select(projection)
+
+        if status:
+            query = query.eq("status", status)
+
+        # Most recent first; calls without a start_time sort last and id breaks ties
+        return query.order("start_time", desc=True, nullsfirst=False).order("id", desc=True)
+
     async def get_all_calls(
         self,
         skip: int = 0,
         limit: int = 50,
-        status: Optional[str] = None
+        status: Optional[str] = None,
+        view: str = "summary",
+        fields: Optional[str] = None
     ) -> List[Dict[str, Any]]:
-        """Get all calls with optional filtering"""
-        query = self.db.table(self.table_name).select("*, leads(*)")
+        """Get all calls with optional filtering and offset pagination
 
-        if status:
-            query = query.eq("status", status)
-
-        query = query.order("start_time", desc=True).range(skip, skip + limit - 1)
+        Returns the `view` projection (summary columns plus a minimal lead by
+        default) or the custom comma-separated `fields` projection.
+        """
+        projection = build_projection(fields, CALL_PROJECTIONS, CALL_COLUMNS, CALL_EMBEDS, view)
+        query = self._list_query(projection, status).range(skip, skip + limit - 1)
 
         response = query.execute()
         return response.data if response.data else []
 
+    async def get_calls_page(
+        self,
+        limit: int = 50,
+        status: Optional[str] = None,
+        view: str = "summary",
+        fields: Optional[str] = None,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Get a page of calls using keyset pagination on (start_time, id)
+
+        Returns {"items": [...], "next_cursor": str | None}. Pass next_cursor
+        back as `cursor` to fetch the following page.
+
+        Raises:
+            ValueError: If the cursor, view or fields are invalid
+        """
+        if fields:
+            fields = f"{fields},start_time"
+        projection = build_projection(fields, CALL_PROJECTIONS, CALL_COLUMNS, CALL_EMBEDS, view)
+        query = self._list_query(projection, status)
+
+        if cursor:
+            query = query.or_(keyset_filter("start_time", cursor))
+
+        response = query.limit(limit + 1).execute()
+        return keyset_page(response.data or [], "start_time", limit)
+
+    async def iter_calls(
+        self,
+        status: Optional[str] = None,
+        view: str = "summary",
+        fields: Optional[str] = None
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield every matching call in keyset-paged chunks of settings.export_chunk_size rows
+
+        Raises:
+            ValueError: If the view or fields are invalid
+        """
+        cursor = None
+        while True:
+            page = await self.get_calls_page(settings.export_chunk_size, status, view, fields, cursor)
+            if page["items"]:
+                yield page["items"]
+            cursor = page["next_cursor"]
+            if not cursor:
+                return
+
     async def end_call(self, call_id: str) -> bool:
         """End an active call"""
         # Get call from database
@@ -105,9 +344,41 @@ class CallService:
                 "status": "ended",
                 "end_time": datetime.utcnow().isoformat()
             }).eq("id", call_id).execute()
+            invalidate_call(call_id)
+            invalidate_summary()
+            await record_side_effect(
+                "update lead last call",
+                LeadService(self.db).update_last_call(call_id, {"last_call_status": "ended"})
+            )
+            await record_side_effect(
+                "record call rollups", AnalyticsService(self.db).record_calls([call_id])
+            )
 
         return success
 
+    async def update_call_analyses(self, analyses: List[Dict[str, Any]]) -> List[str]:
+        """Save AI analyses ({id, summary, ai_score, qualification}) for many calls
+
+        The apply_call_analyses database function merges ai_score and
+        qualification into each call's metadata with a JSONB `||` in a single
+        UPDATE, so concurrent metadata writes are never lost, and updates the
+        lead's last_ai_score when the call is the lead's last call.
+
+        Returns:
+            Ids of the calls that were updated
+        """
+        response = self.db.rpc("apply_call_analyses", {"p_analyses": analyses}).execute()
+        rows = response.data or []
+
+        for row in rows:
+            invalidate_call(row["call_id"])
+        for lead_id in {row["lead_id"] for row in rows}:
+            invalidate_lead(lead_id)
+
+        call_ids = [row["call_id"] for row in rows]
+        await record_side_effect("record call rollups", AnalyticsService(self.db).record_calls(call_ids))
+        return call_ids
+
     async def update_call_from_webhook(
         self,
         provider_call_id: str,
@@ -120,6 +391,21 @@ class CallService:
         response = self.db.table(self.table_name).update(updates).eq(
             "provider_call_id", provider_call_id
         ).execute()
+        for call in response.data or []:
+            invalidate_call(call["id"])
+        invalidate_summary()
+
+        if "status" in updates:
+            lead_service = LeadService(self.db)
+            for call in response.data or []:
+                await record_side_effect(
+                    "update lead last call",
+                    lead_service.update_last_call(call["id"], {"last_call_status": updates["status"]})
+                )
+        await record_side_effect(
+            "record call rollups",
+            AnalyticsService(self.db).record_calls([call["id"] for call in response.data or []])
+        )
 
         return len(response.data) > 0 if response.data else False
 
@@ -152,7 +438,19 @@ class CallService:
         }
 
         response = self.db.table(self.table_name).insert(call_record).execute()
-        return response.data[0]
+        invalidate_summary()
+
+        call = response.data[0]
+        await record_side_effect("record call on lead", LeadService(self.db).record_call(
+            call["lead_id"],
+            call["id"],
+            call.get("start_time") or call.get("created_at"),
+            call.get("status")
+        ))
+        await record_side_effect(
+            "record call rollups", AnalyticsService(self.db).record_calls([call["id"]])
+        )
+        return call
 
     async def update_call_transcript(
         self,
@@ -179,5 +477,6 @@ class CallService:
         response = self.db.table(self.table_name).update({
             "transcript": current_transcript
         }).eq("provider_call_id", provider_call_id).execute()
+        invalidate_call(call["id"])
 
         return len(response.data) > 0 if response.data else False
@@ -1,6 +1,66 @@
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, AsyncIterator, Iterable, List, Set
 from supabase import Client
+from app.config import settings
 from app.models.lead import LeadCreate, LeadUpdate, LeadResponse
+from app.services.record_cache import lead_cache, invalidate_lead
+from app.services.stats_service import invalidate_summary
+from app.utils.pagination import keyset_filter, keyset_page
+from app.utils.phone import normalize_phones, to_e164
+from app.utils.projection import build_projection
+
+
+# Columns a client may request through `fields=` on list endpoints
+LEAD_COLUMNS = (
+    "id", "name", "business_name", "phone", "email", "address", "city",
+    "state", "country", "postal_code", "rating", "google_place_id", "source",
+    "metadata", "tags", "notes", "status", "created_at", "updated_at",
+    "phone_digits", "phone_e164", "last_call_id", "last_call_at", "last_call_status",
+    "call_count", "last_ai_score",
+)
+
+# Denormalized last-call summary kept up to date by CallService and WebhookService
+LAST_CALL_COLUMNS = (
+    "last_call_id", "last_call_at", "last_call_status", "call_count", "last_ai_score",
+)
+
+# Named projections for list endpoints; metadata is only returned by get_lead
+LEAD_PROJECTIONS = {
+    "summary": ", ".join(
+        c for c in LEAD_COLUMNS if c != "metadata" and c not in LAST_CALL_COLUMNS
+    ),
+    "full": "*",
+}
+
+# Optional column groups for `include=` on list endpoints
+LEAD_INCLUDES = {
+    "last_call": LAST_CALL_COLUMNS,
+}
+
+
+def _apply_includes(projection: str, include: Optional[str]) -> str:
+    """Append the column groups named in a comma-separated `include` to a projection
+
+    Raises:
+        ValueError: If an include is unknown
+    """
+    if not include:
+        return projection
+
+    extra = []
+    for name in include.split(","):
+        name = name.strip()
+        if not name:
+            continue
+        if name not in LEAD_INCLUDES:
+            raise ValueError(
+                f"Unknown include: {name}. Supported includes: {', '.join(LEAD_INCLUDES)}"
+            )
+        extra.extend(LEAD_INCLUDES[name])
+
+    # "*" already returns every column
+    if not extra or projection == "*":
+        return projection
+    return ", ".join([projection, *dict.fromkeys(extra)])
 
 
 class LeadService:
@@ -10,50 +70,181 @@ class LeadService:
         self.db = supabase
         self.table_name = "leads"
 
+    def _list_query(self, projection: str, status: Optional[str] = None):
+        """Build the filtered, ordered list query shared by offset and cursor paging"""
+        query = self.db.table(self.table_name).select(projection)
+
+        # Filter by status if provided
+        if status:
+            query = query.eq("status", status)
+
+        # Newest first; id breaks ties so the order is stable for keyset paging
+        return query.order("created_at", desc=True, nullsfirst=False).order("id", desc=True)
+
     async def get_leads(
         self,
         skip: int = 0,
         limit: int = 50,
         status: Optional[str] = None,
-        search: Optional[str] = None
+        search: Optional[str] = None,
+        view: str = "summary",
+        fields: Optional[str] = None,
+        include: Optional[str] = None
     ) -> List[Dict[str, Any]]:
-        """Get all leads with optional filtering and pagination"""
-        query = self.db.table(self.table_name).select("*")
+        """Get all leads with optional filtering and offset pagination
 
-        # Filter by status if provided
-        if status:
-            query = query.eq("status", status)
+        Returns the `view` projection or the custom comma-separated `fields`
+        projection, plus any column groups named in `include` (e.g. last_call).
+        """
+        projection = build_projection(fields, LEAD_PROJECTIONS, LEAD_COLUMNS, view=view)
+        projection = _apply_includes(projection, include)
 
-        # Search across name, business_name, and phone
         if search:
-            query = query.or_(
-                f"name.ilike.%{search}%,"
-                f"business_name.ilike.%{search}%,"
-                f"phone.ilike.%{search}%"
-            )
+            return await self.search_leads(search, projection, status, skip, limit)
 
-        # Order and paginate
-        query = query.order("created_at", desc=True).range(skip, skip + limit - 1)
+        query = self._list_query(projection, status).range(skip, skip + limit - 1)
 
         response = query.execute()
         return response.data if response.data else []
 
+    async def search_leads(
+        self,
+        search: str,
+        projection: str = "*",
+        status: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 50
+    ) -> List[Dict[str, Any]]:
+        """Search leads by name, business name or phone, best matches first
+
+        Runs the search_leads database function, which uses the full-text and
+        trigram indexes on name/business_name and the digits-only phone_digits
+        column instead of scanning the table. A search that is a phone number
+        in any format also matches its E.164 form exactly.
+        """
+        response = self.db.rpc("search_leads", {
+            "search_query": search,
+            "phone_key": to_e164(search),
+            "status_filter": status,
+            "result_limit": limit,
+            "result_offset": skip,
+        }).select(projection).execute()
+
+        return response.data if response.data else []
+
+    async def get_leads_page(
+        self,
+        limit: int = 50,
+        status: Optional[str] = None,
+        search: Optional[str] = None,
+        view: str = "summary",
+        fields: Optional[str] = None,
+        cursor: Optional[str] = None,
+        include: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Get a page of leads using keyset pagination on (created_at, id)
+
+        Returns {"items": [...], "next_cursor": str | None}. Pass next_cursor
+        back as `cursor` to fetch the following page.
+
+        Raises:
+            ValueError: If the cursor, view or fields are invalid, or a search
+                is requested (search results are ranked, so use offset paging)
+        """
+        if search:
+            raise ValueError("Cursor pagination is not supported with search; use skip/limit")
+
+        if fields:
+            fields = f"{fields},created_at"
+        projection = build_projection(fields, LEAD_PROJECTIONS, LEAD_COLUMNS, view=view)
+        projection = _apply_includes(projection, include)
+        query = self._list_query(projection, status)
+
+        if cursor:
+            query = query.or_(keyset_filter("created_at", cursor))
+
+        response = query.limit(limit + 1).execute()
+        return keyset_page(response.data or [], "created_at", limit)
+
+    async def iter_leads(
+        self,
+        status: Optional[str] = None,
+        search: Optional[str] = None,
+        view: str = "summary",
+        fields: Optional[str] = None,
+        include: Optional[str] = None
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield every matching lead in chunks of settings.export_chunk_size rows
+
+        Walks the keyset pages, so each chunk is one indexed query however deep
+        the export goes. Searches are ranked, so they page by offset instead.
+
+        Raises:
+            ValueError: If the view, fields or include are invalid
+        """
+        chunk_size = settings.export_chunk_size
+
+        if search:
+            skip = 0
+            while True:
+                rows = await self.get_leads(skip, chunk_size, status, search, view, fields, include)
+                if rows:
+                    yield rows
+                if len(rows) < chunk_size:
+                    return
+                skip += chunk_size
+
+        cursor = None
+        while True:
+            page = await self.get_leads_page(chunk_size, status, None, view, fields, cursor, include)
+            if page["items"]:
+                yield page["items"]
+            cursor = page["next_cursor"]
+            if not cursor:
+                return
+
     async def get_lead(self, lead_id: str) -> Optional[Dict[str, Any]]:
-        """Get a single lead by ID"""
+        """Get a single lead by ID (read-through cached)"""
+        lead = lead_cache.get(lead_id)
+        if lead is not None:
+            return lead
+
         response = self.db.table(self.table_name).select("*").eq("id", lead_id).execute()
-        return response.data[0] if response.data else None
+        if not response.data:
+            return None
+
+        lead_cache.set(lead_id, response.data[0])
+        return response.data[0]
 
     async def phone_exists(self, phone: str) -> bool:
-        """Check if a lead with this phone number already exists"""
-        result = self.db.table(self.table_name).select("id").eq("phone", phone).limit(1).execute()
+        """Check if a lead with this phone number (in any format) already exists"""
+        phone_key = to_e164(phone)
+        column, value = ("phone_e164", phone_key) if phone_key else ("phone", phone)
+        result = self.db.table(self.table_name).select("id").eq(column, value).limit(1).execute()
         return bool(result.data)
 
+    async def backfill_phone_e164(self) -> int:
+        """Set phone_e164 on leads saved without it; returns how many were set
+
+        Uses PHONE_DEFAULT_COUNTRY_CODE, the same default as to_e164().
+        """
+        result = self.db.rpc(
+            "backfill_phone_e164",
+            {"p_default_country_code": settings.phone_default_country_code}
+        ).execute()
+        updated = result.data or 0
+        if updated:
+            lead_cache.clear()
+        return updated
+
     async def create_lead(self, lead: LeadCreate) -> Dict[str, Any]:
         """Create a new lead. Raises ValueError if phone already exists."""
         if lead.phone and await self.phone_exists(lead.phone):
             raise ValueError(f"A lead with phone number {lead.phone} already exists")
         lead_data = lead.model_dump()
+        lead_data["phone_e164"] = to_e164(lead.phone)
         response = self.db.table(self.table_name).insert(lead_data).execute()
+        invalidate_summary()
         return response.data[0]
 
     async def update_lead(
@@ -67,41 +258,57 @@ class LeadService:
         if not lead_data:
             # No fields to update
             return await self.get_lead(lead_id)
+        if "phone" in lead_data:
+            lead_data["phone_e164"] = to_e164(lead_data["phone"])
 
         response = self.db.table(self.table_name).update(lead_data).eq("id", lead_id).execute()
+        invalidate_lead(lead_id)
+        invalidate_summary()
         return response.data[0] if response.data else None
 
     async def delete_lead(self, lead_id: str) -> bool:
         """Delete a lead"""
         response = self.db.table(self.table_name).delete().eq("id", lead_id).execute()
+        invalidate_lead(lead_id)
+        invalidate_summary()
         return len(response.data) > 0 if response.data else False
 
     async def bulk_create_leads(
         self,
         leads: List[Dict[str, Any]]
     ) -> Dict[str, Any]:
-        """Bulk create leads, skipping any that share a phone with an existing lead"""
-        # Fetch all existing phones once for efficient dedup
-        existing = self.db.table(self.table_name).select("phone").execute()
-        existing_phones: set = {r["phone"] for r in (existing.data or []) if r.get("phone")}
+        """Bulk create leads, skipping any that share a phone with an existing lead
+
+        Phones are compared by their E.164 form, so "+1 (555) 123-4567" and
+        "5551234567" are the same number. Phones that can't be normalized
+        fall back to an exact match.
+        """
+        phones = [(lead_data.get("phone") or "").strip() for lead_data in leads]
+        phone_keys = list(normalize_phones(phones))
+        known_keys = self._existing_values("phone_e164", {key for key in phone_keys if key})
+        known_phones = self._existing_values(
+            "phone", {phone for phone, key in zip(phones, phone_keys) if phone and not key}
+        )
 
         successful = 0
         failed = 0
         skipped = 0
         errors = []
 
-        for lead_data in leads:
+        for lead_data, phone, phone_key in zip(leads, phones, phone_keys):
             try:
-                phone = (lead_data.get("phone") or "").strip()
-                if phone and phone in existing_phones:
+                if (phone_key and phone_key in known_keys) or (not phone_key and phone in known_phones):
                     skipped += 1
                     continue
 
                 lead = LeadCreate(**lead_data)
                 lead_dict = lead.model_dump()
+                lead_dict["phone_e164"] = phone_key
                 self.db.table(self.table_name).insert(lead_dict).execute()
-                if phone:
-                    existing_phones.add(phone)
+                if phone_key:
+                    known_keys.add(phone_key)
+                elif phone:
+                    known_phones.add(phone)
                 successful += 1
             except Exception as e:
                 failed += 1
@@ -110,6 +317,86 @@ class LeadService:
                     "error": str(e)
                 })
 
+        if successful:
+            invalidate_summary()
+
+        return {
+            "successful": successful,
+            "failed": failed,
+            "skipped": skipped,
+            "errors": errors
+        }
+
+    def _existing_values(self, column: str, values: Iterable[str]) -> Set[str]:
+        """Return which of the given values already exist in a lead column
+
+        Looks values up in chunks with `in` queries instead of once per value.
+        """
+        values = list(values)
+        existing: Set[str] = set()
+        for i in range(0, len(values), 200):
+            response = self.db.table(self.table_name).select(column).in_(
+                column, values[i:i + 200]
+            ).execute()
+            existing.update(row[column] for row in response.data or [] if row.get(column))
+        return existing
+
+    async def bulk_insert_leads(
+        self,
+        leads: List[Dict[str, Any]],
+        batch_size: int = 500
+    ) -> Dict[str, Any]:
+        """Insert leads in batches, skipping any already known by google_place_id or phone
+
+        Duplicates are found with a few bulk lookups on google_place_id and the
+        E.164 phone_e164 column (also within the input itself), then new leads
+        are inserted `batch_size` rows per request.
+        """
+        valid = []
+        errors = []
+        for lead_data in leads:
+            try:
+                valid.append(LeadCreate(**lead_data).model_dump())
+            except Exception as e:
+                errors.append({"data": lead_data, "error": str(e)})
+
+        known_place_ids = self._existing_values(
+            "google_place_id", {l["google_place_id"] for l in valid if l.get("google_place_id")}
+        )
+        for lead, phone_key in zip(valid, normalize_phones(l["phone"] for l in valid)):
+            lead["phone_e164"] = phone_key
+        known_phones = self._existing_values(
+            "phone_e164", {l["phone_e164"] for l in valid if l["phone_e164"]}
+        )
+
+        new_leads = []
+        skipped = 0
+        for lead in valid:
+            place_id = lead.get("google_place_id")
+            phone_key = lead["phone_e164"]
+            if (place_id and place_id in known_place_ids) or (phone_key and phone_key in known_phones):
+                skipped += 1
+                continue
+            new_leads.append(lead)
+            if place_id:
+                known_place_ids.add(place_id)
+            if phone_key:
+                known_phones.add(phone_key)
+
+        successful = 0
+        failed = len(errors)
+        for i in range(0, len(new_leads), batch_size):
+            batch = new_leads[i:i + batch_size]
+            try:
+                self.db.table(self.table_name).insert(batch).execute()
+                successful += len(batch)
+            except Exception as e:
+                failed += len(batch)
+                errors.append({"data": {"batch_start": i, "size": len(batch)}, "error": str(e)})
+
+        if successful:
+            invalidate_summary()
+
         return {
             "successful": successful,
             "failed": failed,
@@ -117,6 +404,38 @@ class LeadService:
             "errors": errors
         }
 
+    async def record_call(
+        self,
+        lead_id: str,
+        call_id: str,
+        call_at: Optional[str],
+        status: Optional[str]
+    ) -> None:
+        """Count a new call against a lead and make it the last call if it is the newest
+
+        Runs the record_lead_call database function so call_count is
+        incremented atomically.
+        """
+        self.db.rpc("record_lead_call", {
+            "p_lead_id": lead_id,
+            "p_call_id": call_id,
+            "p_call_at": call_at,
+            "p_status": status,
+        }).execute()
+        invalidate_lead(lead_id)
+
+    async def update_last_call(self, call_id: str, updates: Dict[str, Any]) -> None:
+        """Update the last-call summary of the lead whose last call is call_id
+
+        Changes to older calls are ignored, since they no longer define the
+        lead's last call.
+        """
+        response = self.db.table(self.table_name).update(updates).eq(
+            "last_call_id", call_id
+        ).execute()
+        for lead in response.data or []:
+            invalidate_lead(lead["id"])
+
     async def get_leads_by_source(self, source: str) -> List[Dict[str, Any]]:
         """Get all leads from a specific source"""
         response = self.db.table(self.table_name).select("*").eq("source", source).execute()
@@ -129,4 +448,6 @@ class LeadService:
     ) -> Optional[Dict[str, Any]]:
         """Update lead status"""
         response = self.db.table(self.table_name).update({"status": status}).eq("id", lead_id).execute()
+        invalidate_lead(lead_id)
+        invalidate_summary()
         return response.data[0] if response.data else None
@@ -0,0 +1,115 @@
+import json
+from typing import Any, Dict, Iterable, Optional
+from app.config import settings
+from app.utils.cache import TTLCache
+from app.utils.disk_cache import DiskCache
+from app.utils.hedging import Hedger
+from app.utils.singleflight import SingleFlight
+
+
+# Google Places responses, keyed by request kind, normalized inputs and field
+# mask. The in-memory tier answers repeated searches without any I/O; the
+# optional on-disk tier (PLACES_CACHE_PATH) keeps them across restarts.
+places_cache = TTLCache(
+    maxsize=settings.places_cache_size,
+    ttl=settings.places_cache_ttl_seconds
+)
+places_disk_cache: Optional[DiskCache] = (
+    DiskCache(settings.places_cache_path, ttl=settings.places_cache_ttl_seconds)
+    if settings.places_cache_path else None
+)
+
+# Per-place records ({tier, place}) merged from every search and details
+# response. Kept apart from places_cache so a bulk harvest, which yields
+# thousands of places, can't evict the cached search pages.
+place_records = TTLCache(
+    maxsize=settings.place_record_cache_size,
+    ttl=settings.places_cache_ttl_seconds
+)
+
+# Concurrent misses for the same key share one upstream request
+places_flight = SingleFlight()
+
+# Hedged upstream requests (PLACES_HEDGING_ENABLED), one per request kind
+# since searches and details lookups have different latency profiles
+places_hedgers: Dict[str, Hedger] = {
+    kind: Hedger(
+        budget=settings.places_hedge_budget,
+        initial_delay_ms=settings.places_hedge_initial_delay_ms
+    )
+    for kind in ("search", "details")
+}
+
+
+def normalize_text(value: Optional[str]) -> str:
+    """Case- and whitespace-insensitive form of a query or location"""
+    return " ".join((value or "").lower().split())
+
+
+def places_cache_key(kind: str, *parts: Any) -> str:
+    """Build a cache key from a request kind and its normalized inputs"""
+    return json.dumps([kind, *parts], separators=(",", ":"))
+
+
+def get_cached(key: str) -> Any:
+    """Look a key up in memory, then on disk (promoting disk hits to memory)"""
+    value = places_cache.get(key)
+    if value is not None or places_disk_cache is None:
+        return value
+
+    value = places_disk_cache.get(key)
+    if value is not None:
+        places_cache.set(key, value)
+    return value
+
+
+def set_cached(key: str, value: Any) -> None:
+    """Store a value in every tier"""
+    places_cache.set(key, value)
+    if places_disk_cache is not None:
+        places_disk_cache.set(key, value)
+
+
+def get_place_records(place_ids: Iterable[str]) -> Dict[str, Any]:
+    """Look place records up in memory, then on disk in one query (promoting disk hits)"""
+    records = {}
+    missing = []
+    for place_id in place_ids:
+        record = place_records.get(place_id)
+        if record is not None:
+            records[place_id] = record
+        else:
+            missing.append(place_id)
+
+    if missing and places_disk_cache is not None:
+        found = places_disk_cache.get_many(places_cache_key("place", place_id) for place_id in missing)
+        for place_id in missing:
+            record = found.get(places_cache_key("place", place_id))
+            if record is not None:
+                place_records.set(place_id, record)
+                records[place_id] = record
+    return records
+
+
+def set_place_records(records: Dict[str, Any]) -> None:
+    """Store place records in memory, and on disk in a single transaction"""
+    for place_id, record in records.items():
+        place_records.set(place_id, record)
+    if places_disk_cache is not None:
+        places_disk_cache.set_many({
+            places_cache_key("place", place_id): record for place_id, record in records.items()
+        })
+
+
+def cache_stats() -> Dict[str, Any]:
+    """Return hit/miss metrics for both tiers, request coalescing and hedging counters"""
+    return {
+        "memory": places_cache.stats(),
+        "place_records": place_records.stats(),
+        "disk": places_disk_cache.stats() if places_disk_cache is not None else None,
+        "singleflight": places_flight.stats(),
+        "hedging": (
+            {kind: hedger.stats() for kind, hedger in places_hedgers.items()}
+            if settings.places_hedging_enabled else None
+        ),
+    }
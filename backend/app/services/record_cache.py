@@ -0,0 +1,35 @@
+from typing import Any, Dict
+from app.config import settings
+from app.utils.cache import TTLCache
+
+
+# Read-through caches for single lead and call rows, keyed by row id.
+# Every write path invalidates the affected entries; the TTL only bounds
+# staleness from writes made outside this process.
+lead_cache = TTLCache(
+    maxsize=settings.record_cache_size,
+    ttl=settings.record_cache_ttl_seconds
+)
+call_cache = TTLCache(
+    maxsize=settings.record_cache_size,
+    ttl=settings.record_cache_ttl_seconds
+)
+
+
+def invalidate_lead(lead_id: str) -> None:
+    """Drop a lead and every cached call that embeds it"""
+    lead_cache.invalidate(lead_id)
+    call_cache.invalidate_where(lambda call: call.get("lead_id") == lead_id)
+
+
+def invalidate_call(call_id: str) -> None:
+    """Drop a call by its database id"""
+    call_cache.invalidate(call_id)
+
+
+def cache_stats() -> Dict[str, Any]:
+    """Return hit/miss metrics for the lead and call caches"""
+    return {
+        "leads": lead_cache.stats(),
+        "calls": call_cache.stats(),
+    }
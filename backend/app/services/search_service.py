@@ -1,97 +1,410 @@
+import asyncio
 import httpx
-from typing import List, Optional
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
 from app.config import settings
-from app.models.place import PlaceSearchResponse
+from app.models.place import PlaceDetails, PlaceFieldTier, PlaceSearchGrid, PlaceSearchResponse
+from app.services.places_cache import (
+    get_cached,
+    get_place_records,
+    normalize_text,
+    places_cache_key,
+    places_flight,
+    places_hedgers,
+    set_cached,
+    set_place_records,
+)
+from app.utils.record_replay import RecordReplayTransport
+
+
+# Named field-mask tiers, cheapest first. Each tier includes every field of
+# the tiers before it; Google bills a request by the richest field it asks for.
+PLACE_FIELD_TIERS: Dict[str, Tuple[str, ...]] = {
+    "ids": ("id",),
+    "basic": ("id", "displayName", "formattedAddress", "types"),
+    "contact": (
+        "id", "displayName", "formattedAddress", "types",
+        "internationalPhoneNumber", "rating", "websiteUri",
+    ),
+    "full": (
+        "id", "displayName", "formattedAddress", "types",
+        "internationalPhoneNumber", "rating", "websiteUri",
+        "userRatingCount", "regularOpeningHours",
+    ),
+}
+TIER_RANK = {tier: rank for rank, tier in enumerate(PLACE_FIELD_TIERS)}
+
+
+def search_field_mask(tier: str) -> str:
+    """X-Goog-FieldMask for a Text Search request at a tier"""
+    return ",".join(f"places.{field}" for field in PLACE_FIELD_TIERS[tier]) + ",nextPageToken"
+
+
+def _to_place(place: Dict[str, Any]) -> PlaceDetails:
+    """Convert a Places API (New) place object to a PlaceDetails"""
+    return PlaceDetails(
+        place_id=place.get("id", ""),
+        name=place.get("displayName", {}).get("text", ""),
+        address=place.get("formattedAddress", ""),
+        phone=place.get("internationalPhoneNumber"),
+        rating=place.get("rating"),
+        types=place.get("types", []),
+        website=place.get("websiteUri"),
+        opening_hours=place.get("regularOpeningHours"),
+        user_ratings_total=place.get("userRatingCount")
+    )
+
+
+# One pooled client for every Places request, so connections (and their TLS
+# sessions) are reused across requests and concurrent batch lookups
+_client: Optional[httpx.AsyncClient] = None
+_transport: Optional[RecordReplayTransport] = None
+
+
+def _places_transport() -> Optional[RecordReplayTransport]:
+    """Fixture transport for PLACES_TRANSPORT=record|replay (None talks to Google directly)"""
+    if settings.places_transport == "live":
+        return None
+    return RecordReplayTransport(
+        settings.places_transport,
+        settings.places_fixture_path,
+        latency_ms=settings.places_replay_latency_ms,
+        jitter_ms=settings.places_replay_jitter_ms,
+        key_headers=("X-Goog-FieldMask",),
+        ignore_params=("key",)
+    )
+
+
+def get_places_client() -> httpx.AsyncClient:
+    """Get the shared Places HTTP client, creating it on first use"""
+    global _client, _transport
+    if _client is None or _client.is_closed:
+        _transport = _places_transport()
+        _client = httpx.AsyncClient(
+            timeout=30.0,
+            transport=_transport,
+            limits=httpx.Limits(
+                max_connections=settings.places_concurrency * 2,
+                max_keepalive_connections=settings.places_concurrency
+            )
+        )
+    return _client
+
+
+async def close_places_client() -> None:
+    """Close the shared Places HTTP client (on application shutdown)"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def places_transport_stats() -> Optional[Dict[str, Any]]:
+    """Fixture counters in record/replay mode (None when live)"""
+    return _transport.stats() if _transport is not None else None
+
+
+def _grid_rectangles(grid: PlaceSearchGrid) -> List[Dict[str, Any]]:
+    """Split a bounding box into rows x cols locationRestriction rectangles"""
+    lat_step = (grid.north - grid.south) / grid.rows
+    lng_step = (grid.east - grid.west) / grid.cols
+
+    rectangles = []
+    for row in range(grid.rows):
+        for col in range(grid.cols):
+            south = grid.south + row * lat_step
+            west = grid.west + col * lng_step
+            rectangles.append({"rectangle": {
+                "low": {"latitude": round(south, 6), "longitude": round(west, 6)},
+                "high": {"latitude": round(south + lat_step, 6), "longitude": round(west + lng_step, 6)},
+            }})
+    return rectangles
+
+
+def place_to_lead(place: PlaceSearchResponse, tags: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Convert a place to LeadCreate data, as the search page does"""
+    return {
+        "name": place.name,
+        "phone": place.phone,
+        "address": place.address,
+        "rating": place.rating,
+        "google_place_id": place.place_id,
+        "source": "google_maps",
+        "tags": tags,
+    }
 
 
 class SearchService:
-    """Service for Google Places API (New) search"""
+    """Service for Google Places API (New) search
+
+    Responses are cached (see places_cache) by normalized query, location
+    and field mask, so repeated searches never reach Google, and concurrent
+    identical lookups share a single upstream request.
+
+    Every call takes a field tier (PLACE_FIELD_TIERS). Each place returned
+    by any request is also kept as a per-place record with the tier it was
+    fetched at, so details already returned by a search are served from the
+    cache, and an upgrade (e.g. basic -> contact) only asks for the missing
+    fields.
+
+    With PLACES_HEDGING_ENABLED, a request still unanswered after the
+    observed p95 is sent a second time (see Hedger) and the first answer wins.
+    """
 
     def __init__(self):
         self.api_key = settings.google_maps_api_key
         self.base_url = "https://places.googleapis.com/v1"
 
+    async def _cached(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached value for key, fetching it once however many callers miss at the same time"""
+        value = get_cached(key)
+        if value is not None:
+            return value
+
+        async def load() -> Any:
+            value = await fetch()
+            set_cached(key, value)
+            return value
+
+        return await places_flight.do(key, load)
+
+    async def _request(
+        self,
+        kind: str,
+        send: Callable[[], Awaitable[httpx.Response]]
+    ) -> Dict[str, Any]:
+        """Send a (read-only) Places request, hedged if enabled, and return its JSON"""
+        async def attempt() -> Dict[str, Any]:
+            response = await send()
+            response.raise_for_status()
+            return response.json()
+
+        if settings.places_hedging_enabled:
+            return await places_hedgers[kind].run(attempt)
+        return await attempt()
+
+    def _remember_places(
+        self,
+        places: List[Dict[str, Any]],
+        tier: str
+    ) -> List[Dict[str, Any]]:
+        """Merge fetched places into their per-place records and return the merged places
+
+        Newly fetched fields win; the record keeps the richer of its own tier
+        and the tier the places were fetched at.
+        """
+        records = get_place_records(place["id"] for place in places if place.get("id"))
+        updated = {}
+        merged_places = []
+        for place in places:
+            place_id = place.get("id")
+            if not place_id:
+                merged_places.append(place)
+                continue
+
+            record = updated.get(place_id) or records.get(place_id)
+            record_tier = tier
+            if record is not None:
+                place = {**record["place"], **place}
+                record_tier = max(record["tier"], tier, key=TIER_RANK.__getitem__)
+
+            updated[place_id] = {"tier": record_tier, "place": place}
+            merged_places.append(place)
+
+        # One disk write per page rather than one per place
+        set_place_records(updated)
+        return merged_places
+
     async def search_places(
         self,
         query: str,
-        location: Optional[str] = None
+        location: Optional[str] = None,
+        tier: PlaceFieldTier = "contact"
     ) -> List[PlaceSearchResponse]:
-        """Search for places using Google Places API (New) Text Search"""
-        async with httpx.AsyncClient() as client:
-            headers = {
-                "Content-Type": "application/json",
-                "X-Goog-Api-Key": self.api_key,
-                "X-Goog-FieldMask": (
-                    "places.id,"
-                    "places.displayName,"
-                    "places.formattedAddress,"
-                    "places.internationalPhoneNumber,"
-                    "places.rating,"
-                    "places.types"
-                )
-            }
-
-            payload = {
-                "textQuery": query,
-                "languageCode": "en"
-            }
-
-            if location:
-                payload["textQuery"] = f"{query} in {location}"
-
-            response = await client.post(
-                f"{self.base_url}/places:searchText",
-                json=payload,
-                headers=headers,
-                timeout=30.0
-            )
-            response.raise_for_status()
-            data = response.json()
-
-            results = []
-            for place in data.get("places", []):
-                results.append(PlaceSearchResponse(
-                    place_id=place.get("id", ""),
-                    name=place.get("displayName", {}).get("text", ""),
-                    address=place.get("formattedAddress", ""),
-                    phone=place.get("internationalPhoneNumber"),
-                    rating=place.get("rating"),
-                    types=place.get("types", [])
-                ))
-
-            return results
-
-    async def get_place_details(self, place_id: str) -> PlaceSearchResponse:
-        """Get detailed information about a specific place"""
-        async with httpx.AsyncClient() as client:
-            headers = {
-                "Content-Type": "application/json",
-                "X-Goog-Api-Key": self.api_key,
-                "X-Goog-FieldMask": (
-                    "id,"
-                    "displayName,"
-                    "formattedAddress,"
-                    "internationalPhoneNumber,"
-                    "rating,"
-                    "types,"
-                    "websiteUri"
-                )
-            }
-
-            response = await client.get(
-                f"{self.base_url}/places/{place_id}",
-                headers=headers,
-                timeout=30.0
-            )
-            response.raise_for_status()
-            place = response.json()
-
-            return PlaceSearchResponse(
-                place_id=place.get("id", ""),
-                name=place.get("displayName", {}).get("text", ""),
-                address=place.get("formattedAddress", ""),
-                phone=place.get("internationalPhoneNumber"),
-                rating=place.get("rating"),
-                types=place.get("types", []),
-                website=place.get("websiteUri")
-            )
+        """Search for places using Google Places API (New) Text Search (first page)"""
+        page = await self._search_page(query, location, tier=tier)
+        return [_to_place(place) for place in page.get("places", [])]
+
+    async def search_places_bulk(
+        self,
+        query: str,
+        locations: Optional[List[str]] = None,
+        grid: Optional[PlaceSearchGrid] = None,
+        max_pages: int = 3,
+        tier: PlaceFieldTier = "contact"
+    ) -> AsyncIterator[PlaceSearchResponse]:
+        """Search one query across many locations and/or grid cells, following page tokens
+
+        Every location and grid cell is searched concurrently (bounded by
+        PLACES_CONCURRENCY) for up to `max_pages` pages of 20. Places are
+        yielded as pages arrive, deduplicated by place_id. A failing location
+        is logged and skipped so the rest of the harvest continues.
+        """
+        targets: List[Tuple[Optional[str], Optional[Dict[str, Any]]]] = [
+            (location, None) for location in locations or []
+        ]
+        if grid:
+            targets.extend((None, rectangle) for rectangle in _grid_rectangles(grid))
+        if not targets:
+            targets.append((None, None))
+
+        semaphore = asyncio.Semaphore(settings.places_concurrency)
+        pages: asyncio.Queue = asyncio.Queue()
+
+        async def harvest(location: Optional[str], restriction: Optional[Dict[str, Any]]) -> None:
+            try:
+                page_token = None
+                for page_number in range(max_pages):
+                    async with semaphore:
+                        page = await self._search_page(
+                            query, location, restriction, page_number, page_token, tier
+                        )
+                    await pages.put(page.get("places", []))
+                    page_token = page.get("nextPageToken")
+                    if not page_token:
+                        break
+            except Exception as e:
+                print(f"Bulk place search failed for {location or restriction}: {e}")
+            finally:
+                # One sentinel per target tells the consumer it has finished
+                await pages.put(None)
+
+        tasks = [asyncio.create_task(harvest(*target)) for target in targets]
+        seen = set()
+        remaining = len(tasks)
+        try:
+            while remaining:
+                places = await pages.get()
+                if places is None:
+                    remaining -= 1
+                    continue
+                for place in places:
+                    place_id = place.get("id")
+                    if place_id and place_id not in seen:
+                        seen.add(place_id)
+                        yield _to_place(place)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _search_page(
+        self,
+        query: str,
+        location: Optional[str] = None,
+        restriction: Optional[Dict[str, Any]] = None,
+        page_number: int = 0,
+        page_token: Optional[str] = None,
+        tier: PlaceFieldTier = "contact"
+    ) -> Dict[str, Any]:
+        """Get one page of Text Search results ({"places", "nextPageToken"}), cached"""
+        field_mask = search_field_mask(tier)
+        key = places_cache_key(
+            "search_page", normalize_text(query), normalize_text(location),
+            restriction, page_number, field_mask
+        )
+
+        async def fetch() -> Dict[str, Any]:
+            page = await self._fetch_search(query, location, restriction, page_token, field_mask)
+            self._remember_places(page.get("places", []), tier)
+            return page
+
+        return await self._cached(key, fetch)
+
+    async def _fetch_search(
+        self,
+        query: str,
+        location: Optional[str] = None,
+        restriction: Optional[Dict[str, Any]] = None,
+        page_token: Optional[str] = None,
+        field_mask: str = ""
+    ) -> Dict[str, Any]:
+        """Run a Text Search request and return the raw response"""
+        headers = {
+            "Content-Type": "application/json",
+            "X-Goog-Api-Key": self.api_key,
+            "X-Goog-FieldMask": field_mask or search_field_mask("contact")
+        }
+
+        payload = {
+            "textQuery": query,
+            "languageCode": "en"
+        }
+
+        if location:
+            payload["textQuery"] = f"{query} in {location}"
+        if restriction:
+            payload["locationRestriction"] = restriction
+        if page_token:
+            payload["pageToken"] = page_token
+
+        return await self._request("search", lambda: get_places_client().post(
+            f"{self.base_url}/places:searchText",
+            json=payload,
+            headers=headers
+        ))
+
+    async def get_place_details(
+        self,
+        place_id: str,
+        tier: PlaceFieldTier = "contact"
+    ) -> PlaceDetails:
+        """Get detailed information about a specific place
+
+        Served from the place's record when it was already fetched (by a
+        search or details call) at this tier or richer. Otherwise only the
+        fields the record is missing are requested, and merged in.
+        """
+        record = get_place_records([place_id]).get(place_id)
+        if record is not None and TIER_RANK[record["tier"]] >= TIER_RANK[tier]:
+            return _to_place(record["place"])
+
+        have = set(PLACE_FIELD_TIERS[record["tier"]]) if record is not None else set()
+        fields = ["id"] + [f for f in PLACE_FIELD_TIERS[tier] if f != "id" and f not in have]
+        field_mask = ",".join(fields)
+
+        place = await places_flight.do(
+            places_cache_key("details", place_id, field_mask),
+            lambda: self._fetch_details(place_id, field_mask)
+        )
+        return _to_place(self._remember_places([place], tier)[0])
+
+    async def get_place_details_batch(
+        self,
+        place_ids: List[str],
+        tier: PlaceFieldTier = "contact"
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Get details for many places concurrently, yielding each as it completes
+
+        At most PLACES_CONCURRENCY lookups run at once over the shared client;
+        cached places return immediately. Yields {"place_id", "place"} or
+        {"place_id", "error"} in completion order.
+        """
+        semaphore = asyncio.Semaphore(settings.places_concurrency)
+
+        async def lookup(place_id: str) -> Dict[str, Any]:
+            try:
+                async with semaphore:
+                    place = await self.get_place_details(place_id, tier)
+                return {"place_id": place_id, "place": place.model_dump()}
+            except Exception as e:
+                return {"place_id": place_id, "error": str(e)}
+
+        tasks = [asyncio.create_task(lookup(place_id)) for place_id in dict.fromkeys(place_ids)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _fetch_details(self, place_id: str, field_mask: str) -> Dict[str, Any]:
+        """Run a Place Details request and return the raw place object"""
+        headers = {
+            "Content-Type": "application/json",
+            "X-Goog-Api-Key": self.api_key,
+            "X-Goog-FieldMask": field_mask
+        }
+
+        return await self._request("details", lambda: get_places_client().get(
+            f"{self.base_url}/places/{place_id}",
+            headers=headers
+        ))
@@ -0,0 +1,56 @@
+from typing import Any, Dict, Optional
+from supabase import Client
+from app.config import settings
+from app.utils.cache import TTLCache
+
+
+# One summary shared by every client. Lead and call writes invalidate it,
+# the TTL only bounds staleness from writes made outside this process.
+_summary_cache = TTLCache(maxsize=1, ttl=settings.stats_cache_ttl_seconds)
+
+
+def invalidate_summary() -> None:
+    """Drop the cached dashboard summary after a lead or call write"""
+    _summary_cache.clear()
+
+
+class StatsService:
+    """Service for dashboard counts"""
+
+    def __init__(self, supabase: Client):
+        self.db = supabase
+
+    async def get_summary(self) -> Dict[str, Any]:
+        """Get lead and call counts grouped by status
+
+        Returns {"leads": {"total", "by_status"}, "calls": {"total", "by_status"}},
+        computed by one dashboard_summary() query and cached for a short TTL.
+        """
+        summary = _summary_cache.get("summary")
+        if summary is not None:
+            return summary
+
+        response = self.db.rpc("dashboard_summary", {}).execute()
+        data = response.data or {}
+
+        summary = {}
+        for table in ("leads", "calls"):
+            by_status = data.get(table) or {}
+            summary[table] = {
+                "total": sum(by_status.values()),
+                "by_status": by_status,
+            }
+
+        _summary_cache.set("summary", summary)
+        return summary
+
+    async def count(self, table: str, status: Optional[str] = None) -> int:
+        """Count leads or calls, optionally for one status, from the cached summary"""
+        summary = (await self.get_summary())[table]
+        if status:
+            return summary["by_status"].get(status, 0)
+        return summary["total"]
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Return hit/miss metrics for the summary cache"""
+        return _summary_cache.stats()
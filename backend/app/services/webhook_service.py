@@ -1,6 +1,13 @@
 from datetime import datetime
+from typing import Any, Dict, Optional
 from supabase import Client
 from app.adapters.base import WebhookEvent
+from app.services.analytics_service import AnalyticsService
+from app.services.call_events import call_events
+from app.services.call_service import record_side_effect
+from app.services.lead_service import LeadService
+from app.services.record_cache import invalidate_call
+from app.services.stats_service import invalidate_summary
 
 
 class WebhookService:
@@ -11,58 +18,111 @@ class WebhookService:
         self.calls_table = "calls"
 
     async def process_event(self, event: WebhookEvent) -> None:
-        """Process normalized webhook event"""
+        """Process normalized webhook event
+
+        Each handler returns the change it applied, keyed by the call's
+        database id, which is then published to live subscribers.
+        """
+        change: Optional[Dict[str, Any]] = None
         if event.event_type == "call_started":
-            await self._handle_call_started(event)
+            change = await self._handle_call_started(event)
         elif event.event_type == "transcript":
-            await self._handle_transcript(event)
+            change = await self._handle_transcript(event)
         elif event.event_type == "call_ended":
-            await self._handle_call_ended(event)
+            change = await self._handle_call_ended(event)
         elif event.event_type == "status_update":
-            await self._handle_status_update(event)
+            change = await self._handle_status_update(event)
+
+        # Every event except transcripts can change a call's status
+        if event.event_type in ("call_started", "call_ended", "status_update"):
+            invalidate_summary()
+
+        if not change:
+            return
 
-    async def _handle_call_started(self, event: WebhookEvent) -> None:
+        call_id = change.pop("id")
+        invalidate_call(call_id)
+
+        # Publish first, so live viewers see the change even if bookkeeping fails
+        call_events.publish(call_id, event.event_type, {
+            "provider_call_id": event.call_id,
+            "timestamp": event.timestamp,
+            "data": change,
+        })
+
+        # Keep the lead's denormalized last-call status in step
+        if "status" in change:
+            await record_side_effect("update lead last call", LeadService(self.db).update_last_call(
+                call_id, {"last_call_status": change["status"]}
+            ))
+
+        # Transcript entries don't affect any rolled-up measure
+        if event.event_type != "transcript":
+            await record_side_effect(
+                "record call rollups", AnalyticsService(self.db).record_calls([call_id])
+            )
+
+    def _apply_updates(
+        self,
+        provider_call_id: str,
+        updates: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """Update a call by provider id and return the change keyed by its database id"""
+        response = self.db.table(self.calls_table).update(updates).eq(
+            "provider_call_id", provider_call_id
+        ).execute()
+
+        if not response.data:
+            return None
+        return {"id": response.data[0]["id"], **updates}
+
+    async def _handle_call_started(self, event: WebhookEvent) -> Optional[Dict[str, Any]]:
         """Handle call started event"""
         updates = {
             "status": "in_progress",
             "start_time": event.timestamp or datetime.utcnow().isoformat()
         }
 
-        self.db.table(self.calls_table).update(updates).eq(
-            "provider_call_id", event.call_id
-        ).execute()
+        return self._apply_updates(event.call_id, updates)
+
+    async def _handle_transcript(self, event: WebhookEvent) -> Optional[Dict[str, Any]]:
+        """Handle transcript update event
+
+        Only the compact TranscriptMessage is stored, never the raw payload
+        (which carries the whole nested call object on every utterance).
+        Partial utterances are skipped since their final version supersedes them.
+        """
+        entry = event.transcript
+        if entry is None or not entry.is_final:
+            return None
 
-    async def _handle_transcript(self, event: WebhookEvent) -> None:
-        """Handle transcript update event"""
         # Get current call
-        call_response = self.db.table(self.calls_table).select("transcript").eq(
+        call_response = self.db.table(self.calls_table).select("id, transcript").eq(
             "provider_call_id", event.call_id
         ).execute()
 
         if not call_response.data:
-            return
+            return None
 
         call = call_response.data[0]
         current_transcript = call.get("transcript", [])
 
         # Append new transcript entry
+        entry_data = entry.model_dump(exclude_none=True)
         if isinstance(current_transcript, list):
-            current_transcript.append({
-                "timestamp": event.timestamp,
-                "data": event.data
-            })
+            current_transcript.append(entry_data)
         else:
-            current_transcript = [{
-                "timestamp": event.timestamp,
-                "data": event.data
-            }]
+            current_transcript = [entry_data]
 
         # Update database
         self.db.table(self.calls_table).update({
             "transcript": current_transcript
         }).eq("provider_call_id", event.call_id).execute()
 
-    async def _handle_call_ended(self, event: WebhookEvent) -> None:
+        # Subscribers get just the new entry and its position, never the full transcript
+        return {"id": call["id"], "seq": len(current_transcript) - 1, "entry": entry_data}
+
+    async def _handle_call_ended(self, event: WebhookEvent) -> Optional[Dict[str, Any]]:
         """Handle call ended / end-of-call-report event.
 
         Vapi puts the recording URL inside event.data["call"]["recordingUrl"],
@@ -99,14 +159,10 @@ class WebhookService:
         if recording_url:
             updates["recording_url"] = recording_url
 
-        self.db.table(self.calls_table).update(updates).eq(
-            "provider_call_id", event.call_id
-        ).execute()
+        return self._apply_updates(event.call_id, updates)
 
-    async def _handle_status_update(self, event: WebhookEvent) -> None:
+    async def _handle_status_update(self, event: WebhookEvent) -> Optional[Dict[str, Any]]:
         """Handle status update event"""
         status = event.data.get("status", "unknown")
 
-        self.db.table(self.calls_table).update({
-            "status": status
-        }).eq("provider_call_id", event.call_id).execute()
+        return self._apply_updates(event.call_id, {"status": status})
@@ -0,0 +1,69 @@
+import json
+import zlib
+from typing import Any, Optional, Tuple
+
+# zstd is preferred for archives; fall back to zlib when it isn't installed
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+ZSTD_LEVEL = 10
+ZLIB_LEVEL = 9
+
+
+def default_codec() -> str:
+    """Codec used for new archives: zstd when available, otherwise zlib"""
+    return "zstd" if zstandard is not None else "zlib"
+
+
+def compress_json(value: Any, codec: Optional[str] = None) -> Tuple[str, bytes]:
+    """Serialize a value as compact JSON and compress it
+
+    Returns:
+        (codec, compressed bytes). Store the codec next to the data so it can
+        be decompressed whatever the default is later.
+
+    Raises:
+        ValueError: If the codec is unknown or not installed
+    """
+    codec = codec or default_codec()
+    raw = json.dumps(value, separators=(",", ":"), default=str).encode("utf-8")
+
+    if codec == "zstd":
+        if zstandard is None:
+            raise ValueError("zstd codec requires the zstandard package")
+        return codec, zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(raw)
+    if codec == "zlib":
+        return codec, zlib.compress(raw, ZLIB_LEVEL)
+
+    raise ValueError(f"Unknown codec: {codec}. Supported codecs: 'zstd', 'zlib'")
+
+
+def decompress_json(codec: str, data: bytes) -> Any:
+    """Decompress and parse data produced by compress_json
+
+    Raises:
+        ValueError: If the codec is unknown or not installed
+    """
+    if codec == "zstd":
+        if zstandard is None:
+            raise ValueError("zstd codec requires the zstandard package")
+        raw = zstandard.ZstdDecompressor().decompress(data)
+    elif codec == "zlib":
+        raw = zlib.decompress(data)
+    else:
+        raise ValueError(f"Unknown codec: {codec}. Supported codecs: 'zstd', 'zlib'")
+
+    return json.loads(raw)
+
+
+def bytea_to_bytes(value: str) -> bytes:
+    """Decode a bytea value as returned by PostgREST ("\\x" followed by hex)"""
+    return bytes.fromhex(value[2:] if value.startswith("\\x") else value)
+
+
+def bytes_to_bytea(data: bytes) -> str:
+    """Encode bytes as a bytea literal PostgREST accepts"""
+    return "\\x" + data.hex()
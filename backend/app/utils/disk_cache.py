@@ -0,0 +1,129 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional
+
+
+class DiskCache:
+    """SQLite-backed key/value cache with a per-entry time-to-live
+
+    Survives restarts, so it is used as a second tier behind a TTLCache for
+    data that is slow or costly to fetch. Values must be JSON-serializable.
+    Expired entries are dropped when read and by purge_expired().
+    """
+
+    def __init__(self, path: str, ttl: float = 86400.0):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the cached value for key, or default if missing or expired"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return default
+
+            value, expires_at = row
+            if expires_at <= time.time():
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return default
+
+            self.hits += 1
+        return json.loads(value)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Return the cached values for many keys in one query (missing/expired keys are left out)"""
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT key, value, expires_at FROM cache WHERE key IN ({', '.join('?' * len(keys))})",
+                keys
+            ).fetchall()
+
+        found = {key: value for key, value, expires_at in rows if expires_at > now}
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return {key: json.loads(value) for key, value in found.items()}
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store value under key"""
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        encoded = json.dumps(value, separators=(",", ":"), default=str)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, encoded, expires_at)
+            )
+            self._conn.commit()
+
+    def set_many(self, items: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        """Store many values in a single transaction"""
+        if not items:
+            return
+
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        rows = [
+            (key, json.dumps(value, separators=(",", ":"), default=str), expires_at)
+            for key, value in items.items()
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)", rows
+            )
+            self._conn.commit()
+
+    def invalidate(self, key: str) -> None:
+        """Drop a single entry"""
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def purge_expired(self) -> int:
+        """Delete every expired entry and return how many were removed"""
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+            self._conn.commit()
+            return cursor.rowcount
+
+    def clear(self) -> None:
+        """Drop all entries"""
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT count(*) FROM cache").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return size and hit/miss counters"""
+        lookups = self.hits + self.misses
+        return {
+            "path": self.path,
+            "size": len(self),
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
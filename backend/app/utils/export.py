@@ -0,0 +1,59 @@
+import csv
+import io
+import json
+from typing import Any, AsyncIterator, Dict, List
+
+
+# Media type of each export format
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _csv_value(value: Any) -> Any:
+    """Flatten a value for a CSV cell; lists and embedded objects become JSON"""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str)
+    return value
+
+
+async def stream_export(
+    first_chunk: List[Dict[str, Any]],
+    chunks: AsyncIterator[List[Dict[str, Any]]],
+    format: str
+) -> AsyncIterator[str]:
+    """Encode row chunks as CSV or NDJSON text, one chunk at a time
+
+    The first chunk is passed separately so callers can fetch it before the
+    response starts and still turn query errors into a 400. Only one chunk is
+    held in memory at a time. CSV columns come from the first row.
+    """
+    if format == "ndjson":
+        chunk = first_chunk
+        while True:
+            if chunk:
+                yield "".join(json.dumps(row, default=str) + "\n" for row in chunk)
+            chunk = await anext(chunks, None)
+            if chunk is None:
+                return
+
+    if not first_chunk:
+        return
+
+    columns = list(first_chunk[0])
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+    writer.writeheader()
+
+    chunk = first_chunk
+    while True:
+        for row in chunk:
+            writer.writerow({column: _csv_value(row.get(column)) for column in columns})
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+        chunk = await anext(chunks, None)
+        if chunk is None:
+            return
@@ -0,0 +1,124 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, Optional, TypeVar
+
+
+T = TypeVar("T")
+
+
+def percentile(samples: Iterable[float], fraction: float) -> Optional[float]:
+    """Nearest-rank percentile of samples (None if there are none)"""
+    ordered = sorted(samples)
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class Hedger:
+    """Hedged requests: re-send a slow request once and take whichever answers first
+
+    The first attempt starts immediately. If it hasn't finished after the
+    observed p95 latency (or `initial_delay_ms` until `min_samples` requests
+    have been seen), one duplicate attempt starts and the first to succeed
+    wins. A losing duplicate is cancelled; a losing first attempt is left to
+    finish so the unhedged latency is still measured. Duplicates are capped
+    at `budget` times the number of requests, so a slow upstream can't double
+    the load.
+
+    Only use it for idempotent requests.
+    """
+
+    def __init__(
+        self,
+        budget: float = 0.05,
+        initial_delay_ms: float = 1000.0,
+        window: int = 500,
+        min_samples: int = 20
+    ):
+        self.budget = budget
+        self.initial_delay_ms = initial_delay_ms
+        self.min_samples = min_samples
+        # Latency of first attempts, i.e. what callers would see without
+        # hedging; it sets the hedge delay
+        self._attempts: Deque[float] = deque(maxlen=window)
+        # Latency callers actually saw
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.over_budget = 0
+
+    def delay_ms(self) -> float:
+        """How long to wait before sending a duplicate"""
+        if len(self._attempts) < self.min_samples:
+            return self.initial_delay_ms
+        return percentile(self._attempts, 0.95)
+
+    async def run(self, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run fn(), hedging it with a second fn() if it is slow"""
+        self.requests += 1
+        started = time.perf_counter()
+        primary = asyncio.ensure_future(fn())
+        primary.add_done_callback(lambda task: self._record_attempt(task, started))
+        attempts = [primary]
+        keep_primary = False
+
+        try:
+            done, _ = await asyncio.wait(attempts, timeout=self.delay_ms() / 1000)
+            if not done:
+                if self.hedged < self.budget * self.requests:
+                    self.hedged += 1
+                    attempts.append(asyncio.ensure_future(fn()))
+                else:
+                    self.over_budget += 1
+
+            pending = set(attempts)
+            while True:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # Prefer a success; only fail once every attempt has failed
+                winner = next((task for task in done if task.exception() is None), None)
+                if winner is not None or not pending:
+                    break
+
+            self._latencies.append((time.perf_counter() - started) * 1000)
+            if winner is None:
+                return next(iter(done)).result()
+            if winner is not primary:
+                self.hedge_wins += 1
+                # Let the slow first attempt finish (it is already sent) so its
+                # latency is measured rather than guessed
+                keep_primary = True
+            return winner.result()
+        finally:
+            for task in attempts:
+                if task is not primary or not keep_primary:
+                    task.cancel()
+
+    def _record_attempt(self, task: asyncio.Task, started: float) -> None:
+        """Record how long a finished first attempt took"""
+        if task.cancelled():
+            return
+        # Retrieve the exception, if any, so an abandoned attempt doesn't log it
+        task.exception()
+        self._attempts.append((time.perf_counter() - started) * 1000)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hedging counters, the current hedge delay and latency percentiles"""
+        def rounded(value: Optional[float]) -> Optional[float]:
+            return round(value, 1) if value is not None else None
+
+        return {
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "over_budget": self.over_budget,
+            "hedge_rate": round(self.hedged / self.requests, 4) if self.requests else 0.0,
+            "delay_ms": rounded(self.delay_ms()),
+            "latency_ms": {
+                f"p{int(q * 100)}": rounded(percentile(self._latencies, q)) for q in (0.50, 0.95, 0.99)
+            },
+            "unhedged_latency_ms": {
+                f"p{int(q * 100)}": rounded(percentile(self._attempts, q)) for q in (0.50, 0.95, 0.99)
+            },
+        }
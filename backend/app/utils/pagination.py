@@ -0,0 +1,70 @@
+import base64
+import json
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def encode_cursor(sort_value: Optional[str], row_id: str) -> str:
+    """Encode the (sort value, id) of the last row on a page as an opaque cursor"""
+    raw = json.dumps([sort_value, row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[str], str]:
+    """Decode a cursor produced by encode_cursor
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+    # Both values are interpolated into a PostgREST filter, so only accept
+    # a UUID id and an ISO timestamp sort value
+    try:
+        uuid.UUID(row_id)
+        if sort_value is not None:
+            datetime.fromisoformat(sort_value)
+    except (TypeError, ValueError):
+        raise ValueError("Invalid cursor")
+
+    return sort_value, row_id
+
+
+def keyset_filter(column: str, cursor: str) -> str:
+    """Build a PostgREST `or` filter selecting rows after the cursor
+
+    Rows are ordered by (column DESC NULLS LAST, id DESC), so "after" means a
+    smaller sort value, an equal sort value with a smaller id, or a NULL sort
+    value (NULLs come last).
+    """
+    sort_value, row_id = decode_cursor(cursor)
+
+    if sort_value is None:
+        return f"and({column}.is.null,id.lt.{row_id})"
+
+    # Quote the value: timestamps contain reserved characters like ':' and '+'
+    return (
+        f'{column}.lt."{sort_value}",'
+        f'and({column}.eq."{sort_value}",id.lt.{row_id}),'
+        f"{column}.is.null"
+    )
+
+
+def keyset_page(
+    rows: List[Dict[str, Any]],
+    column: str,
+    limit: int
+) -> Dict[str, Any]:
+    """Split a result fetched with limit + 1 rows into a page and its next cursor"""
+    items = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit and items:
+        last = items[-1]
+        next_cursor = encode_cursor(last.get(column), last["id"])
+
+    return {"items": items, "next_cursor": next_cursor}
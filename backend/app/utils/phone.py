@@ -0,0 +1,87 @@
+import re
+from functools import lru_cache
+from typing import Any, Iterable, Optional, Union
+import numpy as np
+import pandas as pd
+from app.config import settings
+
+
+# Trailing extension ("ext. 12", "x12", "#12"), which isn't part of the dialable number
+EXTENSION_RE = re.compile(r"\s*(?:ext\.?|extension|x|#)\s*\d{1,6}\s*$", re.IGNORECASE)
+# Spreadsheet cells read as floats ("5551234567.0")
+FLOAT_RE = re.compile(r"^(\d+)\.0+$")
+NON_DIGIT_RE = re.compile(r"\D")
+# Country code + subscriber number, without "+": NANP numbers are 1 plus ten
+# digits with an area code starting 2-9; others 8-15 digits with no leading 0/1
+E164_DIGITS_RE = re.compile(r"1[2-9]\d{9}|[2-9]\d{7,14}")
+
+
+@lru_cache(maxsize=65536)
+def _to_e164(phone: str, country_code: str) -> Optional[str]:
+    value = FLOAT_RE.sub(r"\1", EXTENSION_RE.sub("", phone.strip()))
+    digits = NON_DIGIT_RE.sub("", value)
+
+    if value.startswith("+"):
+        number = digits
+    elif digits.startswith("00"):
+        # International dialing prefix
+        number = digits[2:]
+    elif country_code == "1":
+        number = digits if len(digits) == 11 and digits.startswith("1") else country_code + digits
+    else:
+        # Drop the national trunk prefix ("020 7946 0000" -> "+44 20 7946 0000")
+        number = country_code + (digits[1:] if digits.startswith("0") else digits)
+
+    return f"+{number}" if E164_DIGITS_RE.fullmatch(number) else None
+
+
+def to_e164(phone: Any, default_country_code: Optional[str] = None) -> Optional[str]:
+    """Canonical E.164 form of a phone number ("+15551234567"), or None if it isn't one
+
+    Numbers without a "+" or "00" prefix are taken as national numbers of
+    `default_country_code` (PHONE_DEFAULT_COUNTRY_CODE). Results are
+    memoized, since the same numbers recur across imports and lookups.
+    """
+    if phone is None or (isinstance(phone, float) and pd.isna(phone)):
+        return None
+    return _to_e164(str(phone), default_country_code or settings.phone_default_country_code)
+
+
+def normalize_phones(
+    phones: Union[pd.Series, Iterable[Any]],
+    default_country_code: Optional[str] = None
+) -> pd.Series:
+    """Vectorized to_e164 over a column of phone numbers
+
+    Gives the same results as to_e164 for each value (None where a value is
+    missing or not a valid number), using pandas string operations over the
+    column's distinct values instead of a Python call per row.
+    """
+    country_code = default_country_code or settings.phone_default_country_code
+    values = phones if isinstance(phones, pd.Series) else pd.Series(list(phones), dtype=object)
+
+    # Normalize each distinct value once; imports repeat the same numbers a lot
+    codes, uniques = pd.factorize(values.astype("string"), use_na_sentinel=True)
+    text = pd.Series(uniques, dtype="string").str.strip()
+    text = text.str.replace(EXTENSION_RE, "", regex=True)
+    has_dot = text.str.contains(".", regex=False)
+    text[has_dot] = text[has_dot].str.replace(FLOAT_RE, r"\1", regex=True)
+    digits = text.str.replace(NON_DIGIT_RE, "", regex=True)
+
+    international = text.str.startswith("+")
+    idd = ~international & digits.str.startswith("00")
+
+    if country_code == "1":
+        has_country_code = (digits.str.len() == 11) & digits.str.startswith("1")
+        number = digits.where(has_country_code, country_code + digits)
+    else:
+        number = country_code + digits.str.replace(r"^0", "", regex=True)
+    number = number.where(~international, digits).where(~idd, digits.str[2:])
+
+    valid = number.str.fullmatch(E164_DIGITS_RE).astype(bool)
+    normalized = ("+" + number).astype(object).where(valid, None).to_numpy()
+
+    result = np.full(len(codes), None, dtype=object)
+    found = codes >= 0
+    result[found] = normalized[codes[found]]
+    return pd.Series(result, index=values.index, dtype=object)
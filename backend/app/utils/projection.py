@@ -0,0 +1,54 @@
+from typing import Dict, Iterable, Optional
+
+
+def build_projection(
+    fields: Optional[str],
+    projections: Dict[str, str],
+    columns: Iterable[str],
+    embeds: Optional[Dict[str, str]] = None,
+    view: str = "summary"
+) -> str:
+    """Resolve a PostgREST select string for a list endpoint
+
+    Args:
+        fields: Comma-separated custom projection from the `fields=` query
+            parameter, e.g. "id,status,lead". Takes precedence over `view`.
+        projections: Named projections, e.g. {"summary": "...", "full": "*"}
+        columns: Column names allowed in a custom projection
+        embeds: Extra tokens that expand to an embedded resource,
+            e.g. {"lead": "leads(id, name)"}
+        view: Name of the projection to use when `fields` is not given
+
+    Returns:
+        Select string to pass to `.select()`
+
+    Raises:
+        ValueError: If the view or any requested field is unknown
+    """
+    embeds = embeds or {}
+
+    if not fields:
+        if view not in projections:
+            raise ValueError(
+                f"Unknown view: {view}. Supported views: {', '.join(projections)}"
+            )
+        return projections[view]
+
+    allowed = set(columns)
+    selected = []
+    for field in fields.split(","):
+        field = field.strip()
+        if not field or field in selected:
+            continue
+        if field not in allowed and field not in embeds:
+            raise ValueError(f"Unknown field: {field}")
+        selected.append(field)
+
+    if not selected:
+        raise ValueError("No fields requested")
+
+    # Always return the primary key so rows can be addressed by the client
+    if "id" not in selected:
+        selected.insert(0, "id")
+
+    return ", ".join(embeds.get(field, field) for field in selected)
@@ -0,0 +1,146 @@
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import random
+from typing import Any, Dict, Iterable
+from urllib.parse import parse_qsl, urlencode
+import httpx
+
+
+class RecordReplayTransport(httpx.AsyncBaseTransport):
+    """httpx transport that records real responses to a fixture file and replays them
+
+    record: forwards every request to the network and stores the response.
+    replay: answers from the fixture file only, after a configurable delay,
+        so code paths can be tested and load-tested with no network or keys.
+        Requests without a fixture get a 502.
+
+    Requests are matched on method, URL (minus `ignore_params`, e.g. API
+    keys), body and the values of `key_headers` (e.g. a field mask). The
+    store is one gzip-compressed JSON file.
+    """
+
+    def __init__(
+        self,
+        mode: str,
+        path: str,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        key_headers: Iterable[str] = (),
+        ignore_params: Iterable[str] = (),
+        flush_every: int = 20
+    ):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown mode: {mode}. Supported modes: 'record', 'replay'")
+
+        self.mode = mode
+        self.path = path
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.key_headers = tuple(key_headers)
+        self.ignore_params = set(ignore_params)
+        self.flush_every = flush_every
+        # Seeded so replayed latencies are the same on every run
+        self._random = random.Random(0)
+        self._fixtures: Dict[str, Dict[str, Any]] = self._load()
+        self._unsaved = 0
+        self._network = httpx.AsyncHTTPTransport() if mode == "record" else None
+        self.recorded = 0
+        self.replayed = 0
+        self.misses = 0
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """Read the fixture file, or start empty if it doesn't exist yet"""
+        if not os.path.exists(self.path):
+            return {}
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            return json.load(f)
+
+    def save(self) -> None:
+        """Write all fixtures to disk (atomically replacing the file)"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(self._fixtures, f, separators=(",", ":"), sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self._unsaved = 0
+
+    def _key(self, request: httpx.Request) -> str:
+        """Fingerprint of everything that selects a response"""
+        params = sorted(
+            (k, v) for k, v in parse_qsl(request.url.query.decode())
+            if k not in self.ignore_params
+        )
+        parts = [
+            request.method,
+            f"{request.url.host}{request.url.path}?{urlencode(params)}",
+            *(request.headers.get(header, "") for header in self.key_headers),
+        ]
+        digest = hashlib.sha256("\n".join(parts).encode("utf-8"))
+        digest.update(request.content)
+        return digest.hexdigest()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        key = self._key(request)
+
+        if self.mode == "record":
+            response = await self._network.handle_async_request(request)
+            body = await response.aread()
+            await response.aclose()
+            self._fixtures[key] = {
+                "status": response.status_code,
+                "content_type": response.headers.get("content-type", "application/json"),
+                "body": body.decode("utf-8"),
+            }
+            self.recorded += 1
+            self._unsaved += 1
+            if self._unsaved >= self.flush_every:
+                self.save()
+            return httpx.Response(
+                response.status_code,
+                headers={"content-type": self._fixtures[key]["content_type"]},
+                content=body,
+                request=request
+            )
+
+        delay_ms = self.latency_ms + self._random.uniform(0, self.jitter_ms)
+        if delay_ms > 0:
+            await asyncio.sleep(delay_ms / 1000)
+
+        fixture = self._fixtures.get(key)
+        if fixture is None:
+            self.misses += 1
+            return httpx.Response(
+                502,
+                json={"error": f"No recorded fixture for {request.method} {request.url.path}"},
+                request=request
+            )
+
+        self.replayed += 1
+        return httpx.Response(
+            fixture["status"],
+            headers={"content-type": fixture["content_type"]},
+            content=fixture["body"].encode("utf-8"),
+            request=request
+        )
+
+    async def aclose(self) -> None:
+        if self._unsaved:
+            self.save()
+        if self._network is not None:
+            await self._network.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return fixture and request counters"""
+        return {
+            "mode": self.mode,
+            "path": self.path,
+            "fixtures": len(self._fixtures),
+            "recorded": self.recorded,
+            "replayed": self.replayed,
+            "misses": self.misses,
+        }
@@ -0,0 +1,57 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Coalesce concurrent identical async calls into one
+
+    The first caller for a key starts the work as a task; callers arriving
+    while it runs await the same task instead of starting their own. The
+    task is shielded, so one waiter being cancelled doesn't cancel it for
+    the others, and it is cancelled only once every waiter has gone.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._waiters: Dict[Hashable, int] = {}
+        self.started = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run fn() for key, or join the run already in flight"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            self._waiters[key] = 0
+            task.add_done_callback(lambda _: self._forget(key, task))
+            self.started += 1
+        else:
+            self.shared += 1
+
+        self._waiters[key] += 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            if self._inflight.get(key) is task:
+                self._waiters[key] -= 1
+                if self._waiters[key] == 0 and not task.done():
+                    # Nobody is waiting any more; don't finish the work for no one
+                    task.cancel()
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        """Drop a finished task so the next call for its key starts fresh"""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+            del self._waiters[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return in-flight and coalescing counters"""
+        return {
+            "inflight": len(self._inflight),
+            "started": self.started,
+            "shared": self.shared,
+        }
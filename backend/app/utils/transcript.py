@@ -0,0 +1,34 @@
+import hashlib
+from typing import Any, Dict, List
+
+
+def conversation_messages(transcript: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Return the user/assistant entries of a transcript, skipping system messages"""
+    return [
+        entry for entry in transcript or []
+        if entry.get("role") in ("user", "assistant") and entry.get("content")
+    ]
+
+
+def conversation_text(transcript: List[Dict[str, Any]]) -> str:
+    """Render a transcript as "AI: ..." / "USER: ..." lines"""
+    return "\n".join(
+        f"{'AI' if entry['role'] == 'assistant' else 'USER'}: {entry['content'].strip()}"
+        for entry in conversation_messages(transcript)
+    )
+
+
+def transcript_hash(
+    transcript: List[Dict[str, Any]],
+    purpose: str = "",
+    scorer: str = ""
+) -> str:
+    """Content hash of a conversation and its purpose, optionally per scorer
+
+    Only roles and text are hashed, so timestamps and offsets don't make
+    otherwise identical transcripts look different.
+    """
+    content = f"{purpose.strip()}\n{conversation_text(transcript)}"
+    if scorer:
+        content = f"{scorer}\n{content}"
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
@@ -0,0 +1,43 @@
+"""
+Load test for the Places search path (SearchService, caches, bulk harvest)
+
+Record fixtures once against Google (needs GOOGLE_MAPS_API_KEY):
+    PLACES_TRANSPORT=record uv run python bench-places.py
+Then replay them offline, with simulated latency:
+    PLACES_TRANSPORT=replay PLACES_REPLAY_LATENCY_MS=150 PLACES_REPLAY_JITTER_MS=100 uv run python bench-places.py
+"""
+import asyncio
+import json
+import sys
+import time
+from app.services.places_cache import cache_stats, places_cache
+from app.services.search_service import SearchService, close_places_client, places_transport_stats
+
+
+QUERY = "dentist"
+LOCATIONS = ["New York", "Brooklyn", "Queens", "Jersey City", "Newark"]
+ROUNDS = 3
+
+
+async def bench():
+    service = SearchService()
+    # The first round goes through the transport, later ones hit the memory cache
+    places_cache.clear()
+
+    for round_number in range(1, ROUNDS + 1):
+        started = time.perf_counter()
+        count = 0
+        async for _ in service.search_places_bulk(QUERY, LOCATIONS, max_pages=3):
+            count += 1
+        elapsed = time.perf_counter() - started
+        print(f"Round {round_number}: {count} places in {elapsed * 1000:.1f} ms")
+
+    print()
+    print(json.dumps({"cache": cache_stats(), "transport": places_transport_stats()}, indent=2))
+    await close_places_client()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        QUERY = sys.argv[1]
+    asyncio.run(bench())
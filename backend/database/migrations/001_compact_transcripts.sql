@@ -0,0 +1,86 @@
+-- Migration 001: compact transcript entries
+-- Run this in your Supabase SQL Editor after upgrading the backend.
+--
+-- Webhook transcript events used to be stored as
+--   { "timestamp": ..., "data": <entire provider payload incl. nested call> }
+-- They are now stored as compact entries:
+--   { "role", "content", "timestamp", "start", "end", "is_final" }
+-- This rewrites existing rows in place. Entries that are already compact
+-- (e.g. browser web-call logs) are kept as-is, and partial utterances are dropped.
+
+-- Convert one legacy entry to the compact shape (NULL for partial utterances)
+CREATE OR REPLACE FUNCTION compact_transcript_entry(entry JSONB)
+RETURNS JSONB AS $$
+DECLARE
+    payload JSONB := entry->'data';
+    utterance JSONB;
+    words JSONB;
+    role TEXT;
+BEGIN
+    IF payload IS NULL OR jsonb_typeof(payload) <> 'object' THEN
+        RETURN entry;
+    END IF;
+
+    -- Vapi transcript message
+    IF payload ? 'transcript' THEN
+        IF payload->>'transcriptType' = 'partial' THEN
+            RETURN NULL;
+        END IF;
+        RETURN jsonb_strip_nulls(jsonb_build_object(
+            'role', COALESCE(payload->>'role', 'unknown'),
+            'content', payload->>'transcript',
+            'timestamp', entry->>'timestamp',
+            'start', payload->'secondsFromStart',
+            -- Same as VapiAdapter: start + duration (ms), when both are present
+            'end', CASE
+                WHEN jsonb_typeof(payload->'secondsFromStart') = 'number'
+                 AND jsonb_typeof(payload->'duration') = 'number'
+                 AND (payload->>'duration')::float8 <> 0
+                THEN to_jsonb((payload->>'secondsFromStart')::float8 + (payload->>'duration')::float8 / 1000)
+            END,
+            'is_final', true
+        ));
+    END IF;
+
+    -- Retell utterance, optionally nested in "data"
+    utterance := COALESCE(payload->'data', payload);
+    IF utterance ? 'content' THEN
+        role := COALESCE(utterance->>'role', 'unknown');
+        IF role = 'agent' THEN
+            role := 'assistant';
+        END IF;
+        words := utterance->'words';
+        RETURN jsonb_strip_nulls(jsonb_build_object(
+            'role', role,
+            'content', utterance->>'content',
+            'timestamp', entry->>'timestamp',
+            'start', words->0->'start',
+            'end', words->-1->'end',
+            'is_final', true
+        ));
+    END IF;
+
+    -- Unrecognised payload: nothing worth keeping
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+UPDATE public.calls c
+SET transcript = COALESCE((
+    SELECT jsonb_agg(compacted.entry ORDER BY compacted.ord)
+    FROM (
+        SELECT compact_transcript_entry(e.value) AS entry, e.ord
+        FROM jsonb_array_elements(c.transcript) WITH ORDINALITY AS e(value, ord)
+    ) AS compacted
+    WHERE compacted.entry IS NOT NULL
+), '[]'::jsonb)
+WHERE jsonb_typeof(c.transcript) = 'array'
+  AND EXISTS (
+      SELECT 1 FROM jsonb_array_elements(c.transcript) AS e(value)
+      WHERE e.value ? 'data'
+  );
+
+DROP FUNCTION compact_transcript_entry(JSONB);
+
+-- Optionally reclaim the space freed by the rewrite (run on its own, outside a transaction):
+-- VACUUM (FULL, ANALYZE) public.calls;
@@ -0,0 +1,12 @@
+-- Migration 002: composite indexes for keyset (cursor) pagination
+-- Run this in your Supabase SQL Editor after upgrading the backend.
+--
+-- List endpoints order by (created_at, id) for leads and (start_time, id) for
+-- calls, newest first with NULLs last. These indexes match that order exactly
+-- so each page is an index range scan regardless of depth.
+
+CREATE INDEX IF NOT EXISTS idx_leads_created_at_id ON public.leads(created_at DESC NULLS LAST, id DESC);
+CREATE INDEX IF NOT EXISTS idx_calls_start_time_id ON public.calls(start_time DESC NULLS LAST, id DESC);
+
+-- Superseded by idx_leads_created_at_id
+DROP INDEX IF EXISTS public.idx_leads_created_at;
@@ -0,0 +1,58 @@
+-- Migration 003: indexed, ranked lead search
+-- Run this in your Supabase SQL Editor after upgrading the backend.
+--
+-- Replaces the `%ilike%` scan over name/business_name/phone with the
+-- search_leads() function backed by full-text and trigram GIN indexes.
+-- Phone search runs against a digits-only generated column, so
+-- "555-1234", "(555) 1234" and "5551234" all match.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE public.leads
+    ADD COLUMN IF NOT EXISTS phone_digits TEXT GENERATED ALWAYS AS (regexp_replace(phone, '\D', '', 'g')) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_leads_search_fts ON public.leads
+    USING GIN (to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(business_name, '')));
+CREATE INDEX IF NOT EXISTS idx_leads_name_trgm ON public.leads USING GIN (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_leads_business_name_trgm ON public.leads USING GIN (business_name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_leads_phone_digits_trgm ON public.leads USING GIN (phone_digits gin_trgm_ops);
+
+-- Ranked lead search used by GET /api/leads?search=
+-- Matches word prefixes (full-text), substrings of name/business_name
+-- (trigram) and digit substrings of the phone number.
+CREATE OR REPLACE FUNCTION search_leads(
+    search_query TEXT,
+    status_filter TEXT DEFAULT NULL,
+    result_limit INTEGER DEFAULT 50,
+    result_offset INTEGER DEFAULT 0
+)
+RETURNS SETOF public.leads AS $$
+    WITH q AS (
+        SELECT
+            -- Escape LIKE wildcards so user input is matched literally
+            '%' || replace(replace(replace(trim(search_query), '\', '\\'), '%', '\%'), '_', '\_') || '%' AS pattern,
+            trim(search_query) AS raw,
+            regexp_replace(search_query, '\D', '', 'g') AS digits,
+            (
+                SELECT to_tsquery('simple', string_agg(quote_literal(word) || ':*', ' & '))
+                FROM regexp_split_to_table(lower(trim(search_query)), '\s+') AS word
+                WHERE word <> ''
+            ) AS tsq
+    )
+    SELECT l.*
+    FROM public.leads l, q
+    WHERE (status_filter IS NULL OR l.status = status_filter)
+      AND (
+            to_tsvector('simple', coalesce(l.name, '') || ' ' || coalesce(l.business_name, '')) @@ q.tsq
+         OR l.name ILIKE q.pattern
+         OR l.business_name ILIKE q.pattern
+         OR (length(q.digits) >= 3 AND l.phone_digits LIKE '%' || q.digits || '%')
+      )
+    ORDER BY
+        (CASE WHEN length(q.digits) >= 3 AND l.phone_digits = q.digits THEN 2 ELSE 0 END)
+        + coalesce(ts_rank(to_tsvector('simple', coalesce(l.name, '') || ' ' || coalesce(l.business_name, '')), q.tsq), 0)
+        + greatest(similarity(l.name, q.raw), similarity(coalesce(l.business_name, ''), q.raw)) DESC,
+        l.created_at DESC,
+        l.id DESC
+    LIMIT result_limit OFFSET result_offset;
+$$ LANGUAGE sql STABLE;
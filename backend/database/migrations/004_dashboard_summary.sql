@@ -0,0 +1,24 @@
+-- Migration 004: single-query dashboard summary
+-- Run this in your Supabase SQL Editor after upgrading the backend.
+
+-- Lead and call counts grouped by status in a single round trip,
+-- used by GET /api/stats/summary
+CREATE OR REPLACE FUNCTION dashboard_summary()
+RETURNS JSONB AS $$
+    SELECT jsonb_build_object(
+        'leads', (
+            SELECT coalesce(jsonb_object_agg(status, n), '{}'::jsonb)
+            FROM (
+                SELECT coalesce(status, 'unknown') AS status, count(*) AS n
+                FROM public.leads GROUP BY 1
+            ) AS lead_counts
+        ),
+        'calls', (
+            SELECT coalesce(jsonb_object_agg(status, n), '{}'::jsonb)
+            FROM (
+                SELECT coalesce(status, 'unknown') AS status, count(*) AS n
+                FROM public.calls GROUP BY 1
+            ) AS call_counts
+        )
+    );
+$$ LANGUAGE sql STABLE;
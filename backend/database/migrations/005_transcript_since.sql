@@ -0,0 +1,20 @@
+-- Migration 005: incremental transcript fetch
+-- Run this in your Supabase SQL Editor after upgrading the backend.
+
+-- Transcript entries after a sequence number (array position), sliced in
+-- the database so polling only transfers new entries.
+-- Used by GET /api/calls/{id}/transcript?since=
+CREATE OR REPLACE FUNCTION call_transcript_since(p_call_id UUID, p_since INTEGER DEFAULT -1)
+RETURNS JSONB AS $$
+    SELECT jsonb_build_object(
+        'entries', jsonb_path_query_array(
+            coalesce(c.transcript, '[]'::jsonb),
+            '$[$from to last]',
+            jsonb_build_object('from', greatest(p_since + 1, 0))
+        ),
+        'length', jsonb_array_length(coalesce(c.transcript, '[]'::jsonb)),
+        'recording_url', c.recording_url
+    )
+    FROM public.calls c
+    WHERE c.id = p_call_id;
+$$ LANGUAGE sql STABLE;
@@ -0,0 +1,55 @@
+-- Migration 006: denormalized last-call summary on leads
+-- Run this in your Supabase SQL Editor after upgrading the backend.
+--
+-- Lets GET /api/leads?include=last_call show "last called / outcome" without
+-- one /api/calls/lead/{id} request per lead. The backend keeps the columns
+-- up to date as calls are created, change status and get scored.
+
+ALTER TABLE public.leads
+    ADD COLUMN IF NOT EXISTS last_call_id UUID,
+    ADD COLUMN IF NOT EXISTS last_call_at TIMESTAMP WITH TIME ZONE,
+    ADD COLUMN IF NOT EXISTS last_call_status VARCHAR(50),
+    ADD COLUMN IF NOT EXISTS call_count INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS last_ai_score INTEGER;
+
+CREATE INDEX IF NOT EXISTS idx_leads_last_call_id ON public.leads(last_call_id);
+
+-- Count a new call against its lead and make it the lead's last call if it
+-- is the newest one. Called by the backend whenever a call row is created.
+CREATE OR REPLACE FUNCTION record_lead_call(
+    p_lead_id UUID,
+    p_call_id UUID,
+    p_call_at TIMESTAMP WITH TIME ZONE,
+    p_status TEXT
+)
+RETURNS VOID AS $$
+    UPDATE public.leads
+    SET
+        call_count = call_count + 1,
+        last_call_id = CASE WHEN last_call_at IS NULL OR p_call_at >= last_call_at THEN p_call_id ELSE last_call_id END,
+        last_call_status = CASE WHEN last_call_at IS NULL OR p_call_at >= last_call_at THEN p_status ELSE last_call_status END,
+        last_ai_score = CASE WHEN last_call_at IS NULL OR p_call_at >= last_call_at THEN NULL ELSE last_ai_score END,
+        last_call_at = GREATEST(last_call_at, p_call_at)
+    WHERE id = p_lead_id;
+$$ LANGUAGE sql;
+
+-- Backfill from existing calls
+UPDATE public.leads l
+SET
+    call_count = latest.call_count,
+    last_call_id = latest.id,
+    last_call_at = latest.call_at,
+    last_call_status = latest.status,
+    last_ai_score = latest.ai_score
+FROM (
+    SELECT DISTINCT ON (lead_id)
+        lead_id,
+        id,
+        COALESCE(start_time, created_at) AS call_at,
+        status,
+        (metadata->>'ai_score')::numeric::integer AS ai_score,
+        count(*) OVER (PARTITION BY lead_id) AS call_count
+    FROM public.calls
+    ORDER BY lead_id, COALESCE(start_time, created_at) DESC, id DESC
+) AS latest
+WHERE l.id = latest.lead_id;
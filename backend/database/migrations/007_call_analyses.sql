@@ -0,0 +1,37 @@
+-- Migration 007: atomic, batched call analysis updates
+-- Run this in your Supabase SQL Editor after upgrading the backend.
+-- Backs PATCH /api/calls/{id}/analysis and PATCH /api/calls/analysis:batch.
+
+-- Save AI analyses for many calls in one statement. ai_score and
+-- qualification are merged into metadata with `||`, so concurrent writes to
+-- other metadata keys are preserved, and the lead's last_ai_score follows
+-- when the call is the lead's last call.
+-- p_analyses: [{"id", "summary", "ai_score", "qualification"}, ...]
+CREATE OR REPLACE FUNCTION apply_call_analyses(p_analyses JSONB)
+RETURNS TABLE (call_id UUID, lead_id UUID) AS $$
+    WITH analyses AS (
+        SELECT DISTINCT ON (a.id) a.*
+        FROM jsonb_to_recordset(p_analyses)
+            AS a(id UUID, summary TEXT, ai_score INTEGER, qualification TEXT)
+    ),
+    updated AS (
+        UPDATE public.calls c
+        SET
+            summary = a.summary,
+            metadata = COALESCE(c.metadata, '{}'::jsonb) || jsonb_build_object(
+                'ai_score', a.ai_score,
+                'qualification', a.qualification
+            )
+        FROM analyses a
+        WHERE c.id = a.id
+        RETURNING c.id, c.lead_id, a.ai_score
+    ),
+    scored_leads AS (
+        UPDATE public.leads l
+        SET last_ai_score = u.ai_score
+        FROM updated u
+        WHERE l.last_call_id = u.id
+        RETURNING l.id
+    )
+    SELECT u.id, u.lead_id FROM updated u;
+$$ LANGUAGE sql;
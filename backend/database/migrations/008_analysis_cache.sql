@@ -0,0 +1,19 @@
+-- Migration 008: backend call analysis memo table
+-- Run this in your Supabase SQL Editor after upgrading the backend.
+
+-- =====================================================
+-- ANALYSIS CACHE
+-- =====================================================
+-- Call analyses memoized by transcript content hash (sha256 of purpose and
+-- conversation text), so identical transcripts are never scored twice
+CREATE TABLE IF NOT EXISTS public.analysis_cache (
+    transcript_hash CHAR(64) PRIMARY KEY,
+    summary TEXT,
+    ai_score INTEGER,
+    qualification VARCHAR(20),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Finds completed calls still waiting for a score
+CREATE INDEX IF NOT EXISTS idx_calls_pending_analysis ON public.calls(end_time DESC)
+    WHERE (metadata->'ai_score') IS NULL AND status IN ('completed', 'ended');
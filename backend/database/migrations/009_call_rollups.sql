@@ -0,0 +1,238 @@
+-- Migration 009: incremental call analytics rollups
+-- Run this in your Supabase SQL Editor after upgrading the backend.
+-- Backs /api/analytics/*. The last statement backfills existing calls.
+
+-- Hourly and daily call aggregates per provider, purpose, status and
+-- ai_score decile (score_bucket 0-9, -1 = not scored yet), read by
+-- /api/analytics/* instead of scanning calls
+CREATE TABLE IF NOT EXISTS public.call_rollups (
+    granularity VARCHAR(5) NOT NULL,
+    bucket_start TIMESTAMP WITH TIME ZONE NOT NULL,
+    provider VARCHAR(20) NOT NULL,
+    purpose TEXT NOT NULL DEFAULT '',
+    status VARCHAR(50) NOT NULL,
+    score_bucket SMALLINT NOT NULL DEFAULT -1,
+    calls INTEGER NOT NULL DEFAULT 0,
+    connected INTEGER NOT NULL DEFAULT 0,
+    qualified INTEGER NOT NULL DEFAULT 0,
+    duration_seconds BIGINT NOT NULL DEFAULT 0,
+    cost DECIMAL(14,4) NOT NULL DEFAULT 0,
+    ai_score_sum BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (granularity, bucket_start, provider, purpose, status, score_bucket)
+);
+
+-- The values each call was last counted with, so a re-recorded call only
+-- moves its own previous contribution and recording is idempotent
+CREATE TABLE IF NOT EXISTS public.call_rollup_state (
+    call_id UUID PRIMARY KEY,
+    bucket_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    provider VARCHAR(20) NOT NULL,
+    purpose TEXT NOT NULL,
+    status VARCHAR(50) NOT NULL,
+    duration_seconds INTEGER NOT NULL,
+    cost DECIMAL(10,4) NOT NULL,
+    ai_score INTEGER,
+    qualified BOOLEAN NOT NULL
+);
+
+-- Fold the current state of the given calls into call_rollups. Each changed
+-- call retracts its last snapshot and adds its current values; unchanged
+-- calls are no-ops. Called after every call write (webhooks, analyses).
+-- Returns the number of calls whose contribution changed.
+CREATE OR REPLACE FUNCTION record_call_rollups(p_call_ids UUID[])
+RETURNS INTEGER AS $$
+DECLARE
+    changed_count INTEGER;
+BEGIN
+    -- Serialize concurrent recordings of the same call so a delta is applied once
+    PERFORM pg_advisory_xact_lock(hashtextextended(ids.id::text, 0))
+    FROM (SELECT DISTINCT unnest(p_call_ids) AS id ORDER BY 1) AS ids;
+
+    WITH current_calls AS (
+        SELECT
+            c.id AS call_id,
+            COALESCE(c.start_time, c.created_at) AS bucket_at,
+            c.provider,
+            COALESCE(c.purpose, '') AS purpose,
+            COALESCE(c.status, 'unknown') AS status,
+            COALESCE(c.duration_seconds, 0) AS duration_seconds,
+            COALESCE(c.cost, 0) AS cost,
+            ROUND((c.metadata->>'ai_score')::numeric)::INTEGER AS ai_score,
+            COALESCE(c.metadata->>'qualification' = 'qualified', FALSE) AS qualified
+        FROM public.calls c
+        WHERE c.id = ANY(p_call_ids)
+    ),
+    changed AS (
+        SELECT cur.*
+        FROM current_calls cur
+        LEFT JOIN public.call_rollup_state s ON s.call_id = cur.call_id
+        WHERE s.call_id IS NULL
+           OR (s.bucket_at, s.provider, s.purpose, s.status, s.duration_seconds,
+               s.cost, s.ai_score, s.qualified)
+              IS DISTINCT FROM
+              (cur.bucket_at, cur.provider, cur.purpose, cur.status, cur.duration_seconds,
+               cur.cost, cur.ai_score, cur.qualified)
+    ),
+    contributions AS (
+        SELECT s.bucket_at, s.provider, s.purpose, s.status, s.duration_seconds,
+               s.cost, s.ai_score, s.qualified, -1 AS sign
+        FROM public.call_rollup_state s
+        JOIN changed ch ON ch.call_id = s.call_id
+        UNION ALL
+        SELECT ch.bucket_at, ch.provider, ch.purpose, ch.status, ch.duration_seconds,
+               ch.cost, ch.ai_score, ch.qualified, 1 AS sign
+        FROM changed ch
+    ),
+    deltas AS (
+        SELECT
+            g.granularity,
+            date_trunc(g.granularity, c.bucket_at, 'UTC') AS bucket_start,
+            c.provider,
+            c.purpose,
+            c.status,
+            COALESCE(LEAST(GREATEST(c.ai_score, 0), 99) / 10, -1) AS score_bucket,
+            SUM(c.sign) AS calls,
+            SUM(c.sign * (c.duration_seconds > 0)::int) AS connected,
+            SUM(c.sign * c.qualified::int) AS qualified,
+            SUM(c.sign * c.duration_seconds) AS duration_seconds,
+            SUM(c.sign * c.cost) AS cost,
+            SUM(c.sign * COALESCE(c.ai_score, 0)) AS ai_score_sum
+        FROM contributions c
+        CROSS JOIN (VALUES ('hour'), ('day')) AS g(granularity)
+        GROUP BY 1, 2, 3, 4, 5, 6
+    ),
+    applied AS (
+        INSERT INTO public.call_rollups AS r (
+            granularity, bucket_start, provider, purpose, status, score_bucket,
+            calls, connected, qualified, duration_seconds, cost, ai_score_sum
+        )
+        SELECT * FROM deltas
+        ON CONFLICT (granularity, bucket_start, provider, purpose, status, score_bucket)
+        DO UPDATE SET
+            calls = r.calls + EXCLUDED.calls,
+            connected = r.connected + EXCLUDED.connected,
+            qualified = r.qualified + EXCLUDED.qualified,
+            duration_seconds = r.duration_seconds + EXCLUDED.duration_seconds,
+            cost = r.cost + EXCLUDED.cost,
+            ai_score_sum = r.ai_score_sum + EXCLUDED.ai_score_sum
+        RETURNING 1
+    ),
+    snapshots AS (
+        INSERT INTO public.call_rollup_state AS s (
+            call_id, bucket_at, provider, purpose, status, duration_seconds,
+            cost, ai_score, qualified
+        )
+        SELECT call_id, bucket_at, provider, purpose, status, duration_seconds,
+               cost, ai_score, qualified
+        FROM changed
+        ON CONFLICT (call_id) DO UPDATE SET
+            bucket_at = EXCLUDED.bucket_at,
+            provider = EXCLUDED.provider,
+            purpose = EXCLUDED.purpose,
+            status = EXCLUDED.status,
+            duration_seconds = EXCLUDED.duration_seconds,
+            cost = EXCLUDED.cost,
+            ai_score = EXCLUDED.ai_score,
+            qualified = EXCLUDED.qualified
+        RETURNING 1
+    )
+    SELECT count(*) INTO changed_count FROM snapshots;
+
+    RETURN changed_count;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Recompute every rollup from the calls table. Use for the initial
+-- backfill, or to drop the contribution of deleted calls.
+CREATE OR REPLACE FUNCTION rebuild_call_rollups()
+RETURNS INTEGER AS $$
+BEGIN
+    DELETE FROM public.call_rollups;
+    DELETE FROM public.call_rollup_state;
+    RETURN record_call_rollups(ARRAY(SELECT id FROM public.calls));
+END;
+$$ LANGUAGE plpgsql;
+
+-- Aggregated rollup buckets for a time range, optionally grouped by
+-- provider or purpose (p_group_by: 'none', 'provider' or 'purpose').
+-- by_status maps status -> calls; score_histogram maps decile -> calls.
+CREATE OR REPLACE FUNCTION call_rollup_series(
+    p_granularity TEXT DEFAULT 'day',
+    p_from TIMESTAMP WITH TIME ZONE DEFAULT NULL,
+    p_to TIMESTAMP WITH TIME ZONE DEFAULT NULL,
+    p_provider TEXT DEFAULT NULL,
+    p_purpose TEXT DEFAULT NULL,
+    p_group_by TEXT DEFAULT 'none'
+)
+RETURNS TABLE (
+    bucket_start TIMESTAMP WITH TIME ZONE,
+    group_key TEXT,
+    calls BIGINT,
+    connected BIGINT,
+    qualified BIGINT,
+    duration_seconds BIGINT,
+    cost NUMERIC,
+    scored BIGINT,
+    ai_score_sum BIGINT,
+    by_status JSONB,
+    score_histogram JSONB
+) AS $$
+    WITH filtered AS (
+        SELECT
+            r.*,
+            CASE p_group_by
+                WHEN 'provider' THEN r.provider
+                WHEN 'purpose' THEN r.purpose
+            END AS group_key
+        FROM public.call_rollups r
+        WHERE r.granularity = p_granularity
+          AND (p_from IS NULL OR r.bucket_start >= p_from)
+          AND (p_to IS NULL OR r.bucket_start < p_to)
+          AND (p_provider IS NULL OR r.provider = p_provider)
+          AND (p_purpose IS NULL OR r.purpose = p_purpose)
+          AND r.calls <> 0
+    ),
+    statuses AS (
+        SELECT s.bucket_start, s.group_key, jsonb_object_agg(s.status, s.n) AS by_status
+        FROM (
+            SELECT f.bucket_start, f.group_key, f.status, SUM(f.calls) AS n
+            FROM filtered f GROUP BY 1, 2, 3
+        ) AS s
+        GROUP BY 1, 2
+    ),
+    histogram AS (
+        SELECT h.bucket_start, h.group_key, jsonb_object_agg(h.decile, h.n) AS score_histogram
+        FROM (
+            SELECT f.bucket_start, f.group_key, (f.score_bucket * 10)::text AS decile, SUM(f.calls) AS n
+            FROM filtered f WHERE f.score_bucket >= 0 GROUP BY 1, 2, 3
+        ) AS h
+        GROUP BY 1, 2
+    ),
+    totals AS (
+        SELECT
+            f.bucket_start,
+            f.group_key,
+            SUM(f.calls)::BIGINT AS calls,
+            SUM(f.connected)::BIGINT AS connected,
+            SUM(f.qualified)::BIGINT AS qualified,
+            SUM(f.duration_seconds)::BIGINT AS duration_seconds,
+            SUM(f.cost) AS cost,
+            COALESCE(SUM(f.calls) FILTER (WHERE f.score_bucket >= 0), 0)::BIGINT AS scored,
+            SUM(f.ai_score_sum)::BIGINT AS ai_score_sum
+        FROM filtered f
+        GROUP BY 1, 2
+    )
+    SELECT
+        t.bucket_start, t.group_key, t.calls, t.connected, t.qualified,
+        t.duration_seconds, t.cost, t.scored, t.ai_score_sum,
+        COALESCE(s.by_status, '{}'::jsonb),
+        COALESCE(h.score_histogram, '{}'::jsonb)
+    FROM totals t
+    LEFT JOIN statuses s
+        ON s.bucket_start = t.bucket_start AND s.group_key IS NOT DISTINCT FROM t.group_key
+    LEFT JOIN histogram h
+        ON h.bucket_start = t.bucket_start AND h.group_key IS NOT DISTINCT FROM t.group_key
+    ORDER BY t.bucket_start, t.group_key;
+$$ LANGUAGE sql STABLE;
+
+SELECT rebuild_call_rollups();
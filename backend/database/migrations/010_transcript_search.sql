@@ -0,0 +1,106 @@
+-- Migration 010: full-text transcript search
+-- Run this in your Supabase SQL Editor after upgrading the backend.
+-- Backs GET /api/calls/search. The last statement indexes existing calls.
+
+-- Full-text index of finished calls' transcripts, kept in its own table so
+-- `select *` on calls never carries the tsvector. Rows are written by the
+-- trigger below once a call is completed or ended.
+CREATE TABLE IF NOT EXISTS public.call_transcript_index (
+    call_id UUID PRIMARY KEY REFERENCES public.calls(id) ON DELETE CASCADE,
+    document TSVECTOR NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_call_transcript_index_document
+    ON public.call_transcript_index USING GIN (document);
+
+-- Conversation text of a compact transcript (user and assistant turns only)
+CREATE OR REPLACE FUNCTION call_transcript_text(p_transcript JSONB)
+RETURNS TEXT AS $$
+    SELECT coalesce(string_agg(t.entry->>'content', E'\n' ORDER BY t.seq), '')
+    FROM jsonb_array_elements(
+        CASE WHEN jsonb_typeof(p_transcript) = 'array' THEN p_transcript ELSE '[]'::jsonb END
+    ) WITH ORDINALITY AS t(entry, seq)
+    WHERE t.entry->>'role' IN ('user', 'assistant');
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Index a call's transcript when it finishes, and again if a finished
+-- call's transcript changes. In-progress calls are not indexed, so live
+-- per-utterance appends never rebuild the tsvector.
+CREATE OR REPLACE FUNCTION index_call_transcript()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.status NOT IN ('completed', 'ended') THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP = 'UPDATE'
+       AND NEW.transcript IS NOT DISTINCT FROM OLD.transcript
+       AND EXISTS (SELECT 1 FROM public.call_transcript_index WHERE call_id = NEW.id) THEN
+        RETURN NULL;
+    END IF;
+
+    INSERT INTO public.call_transcript_index (call_id, document)
+    VALUES (NEW.id, to_tsvector('english', call_transcript_text(NEW.transcript)))
+    ON CONFLICT (call_id) DO UPDATE SET document = EXCLUDED.document;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS index_calls_transcript ON public.calls;
+CREATE TRIGGER index_calls_transcript
+    AFTER INSERT OR UPDATE OF transcript, status ON public.calls
+    FOR EACH ROW
+    EXECUTE FUNCTION index_call_transcript();
+
+-- Ranked transcript search used by GET /api/calls/search?q=
+-- Accepts web-search syntax ("quoted phrases", OR, -excluded). Ranked by
+-- cover density normalized by log document length; highlighted snippets
+-- are only built for the returned page.
+CREATE OR REPLACE FUNCTION search_call_transcripts(
+    search_query TEXT,
+    result_limit INTEGER DEFAULT 20,
+    result_offset INTEGER DEFAULT 0
+)
+RETURNS TABLE (
+    id UUID,
+    lead_id UUID,
+    lead_name VARCHAR,
+    business_name VARCHAR,
+    provider VARCHAR,
+    status VARCHAR,
+    purpose TEXT,
+    start_time TIMESTAMP WITH TIME ZONE,
+    duration_seconds INTEGER,
+    rank REAL,
+    snippet TEXT
+) AS $$
+    WITH q AS (
+        SELECT websearch_to_tsquery('english', search_query) AS tsq
+    ),
+    matches AS (
+        SELECT i.call_id, ts_rank_cd(i.document, q.tsq, 1) AS rank
+        FROM public.call_transcript_index i, q
+        WHERE i.document @@ q.tsq
+        ORDER BY rank DESC, i.call_id
+        LIMIT result_limit OFFSET result_offset
+    )
+    SELECT
+        c.id, c.lead_id, l.name, l.business_name, c.provider, c.status, c.purpose, c.start_time,
+        c.duration_seconds, m.rank,
+        ts_headline(
+            'english', call_transcript_text(c.transcript), q.tsq,
+            'StartSel=<mark>, StopSel=</mark>, MaxFragments=3, MinWords=5, MaxWords=20, FragmentDelimiter=" … "'
+        )
+    FROM matches m
+    JOIN public.calls c ON c.id = m.call_id
+    LEFT JOIN public.leads l ON l.id = c.lead_id
+    CROSS JOIN q
+    ORDER BY m.rank DESC, m.call_id;
+$$ LANGUAGE sql STABLE;
+
+INSERT INTO public.call_transcript_index (call_id, document)
+SELECT c.id, to_tsvector('english', call_transcript_text(c.transcript))
+FROM public.calls c
+WHERE c.status IN ('completed', 'ended')
+ON CONFLICT (call_id) DO UPDATE SET document = EXCLUDED.document;
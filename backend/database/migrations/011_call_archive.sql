@@ -0,0 +1,104 @@
+-- Migration 011: compressed cold storage for old call transcripts
+-- Run this in your Supabase SQL Editor after upgrading the backend.
+-- Archival itself runs from the backend (POST /api/calls/archive:run or
+-- ARCHIVE_WORKER_ENABLED); space is reclaimed by autovacuum afterwards.
+
+ALTER TABLE public.calls ADD COLUMN IF NOT EXISTS transcript_archive BYTEA;
+ALTER TABLE public.calls ADD COLUMN IF NOT EXISTS archive_codec VARCHAR(10);
+ALTER TABLE public.calls ADD COLUMN IF NOT EXISTS archived_at TIMESTAMP WITH TIME ZONE;
+
+-- Finds ended calls that are not archived yet
+CREATE INDEX IF NOT EXISTS idx_calls_archive_candidates ON public.calls(end_time)
+    WHERE archived_at IS NULL;
+
+-- Archived calls report archived=true and are rehydrated by the backend
+CREATE OR REPLACE FUNCTION call_transcript_since(p_call_id UUID, p_since INTEGER DEFAULT -1)
+RETURNS JSONB AS $$
+    SELECT jsonb_build_object(
+        'entries', jsonb_path_query_array(
+            coalesce(c.transcript, '[]'::jsonb),
+            '$[$from to last]',
+            jsonb_build_object('from', greatest(p_since + 1, 0))
+        ),
+        'length', jsonb_array_length(coalesce(c.transcript, '[]'::jsonb)),
+        'recording_url', c.recording_url,
+        'archived', c.archived_at IS NOT NULL
+    )
+    FROM public.calls c
+    WHERE c.id = p_call_id;
+$$ LANGUAGE sql STABLE;
+
+-- The search index keeps its own copy of the transcript text, so archived
+-- calls still match searches and get snippets
+ALTER TABLE public.call_transcript_index ADD COLUMN IF NOT EXISTS content TEXT NOT NULL DEFAULT '';
+
+UPDATE public.call_transcript_index i
+SET content = call_transcript_text(c.transcript)
+FROM public.calls c
+WHERE c.id = i.call_id AND c.archived_at IS NULL;
+
+CREATE OR REPLACE FUNCTION index_call_transcript()
+RETURNS TRIGGER AS $$
+BEGIN
+    -- Archival empties calls.transcript; the index row and its content stay as they are
+    IF NEW.status NOT IN ('completed', 'ended') OR NEW.archived_at IS NOT NULL THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP = 'UPDATE'
+       AND NEW.transcript IS NOT DISTINCT FROM OLD.transcript
+       AND EXISTS (SELECT 1 FROM public.call_transcript_index WHERE call_id = NEW.id) THEN
+        RETURN NULL;
+    END IF;
+
+    INSERT INTO public.call_transcript_index (call_id, document, content)
+    SELECT NEW.id, to_tsvector('english', t.content), t.content
+    FROM (SELECT call_transcript_text(NEW.transcript) AS content) AS t
+    ON CONFLICT (call_id) DO UPDATE SET document = EXCLUDED.document, content = EXCLUDED.content;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Snippets come from the index's own copy of the text
+CREATE OR REPLACE FUNCTION search_call_transcripts(
+    search_query TEXT,
+    result_limit INTEGER DEFAULT 20,
+    result_offset INTEGER DEFAULT 0
+)
+RETURNS TABLE (
+    id UUID,
+    lead_id UUID,
+    lead_name VARCHAR,
+    business_name VARCHAR,
+    provider VARCHAR,
+    status VARCHAR,
+    purpose TEXT,
+    start_time TIMESTAMP WITH TIME ZONE,
+    duration_seconds INTEGER,
+    rank REAL,
+    snippet TEXT
+) AS $$
+    WITH q AS (
+        SELECT websearch_to_tsquery('english', search_query) AS tsq
+    ),
+    matches AS (
+        SELECT i.call_id, i.content, ts_rank_cd(i.document, q.tsq, 1) AS rank
+        FROM public.call_transcript_index i, q
+        WHERE i.document @@ q.tsq
+        ORDER BY rank DESC, i.call_id
+        LIMIT result_limit OFFSET result_offset
+    )
+    SELECT
+        c.id, c.lead_id, l.name, l.business_name, c.provider, c.status, c.purpose, c.start_time,
+        c.duration_seconds, m.rank,
+        ts_headline(
+            'english', m.content, q.tsq,
+            'StartSel=<mark>, StopSel=</mark>, MaxFragments=3, MinWords=5, MaxWords=20, FragmentDelimiter=" … "'
+        )
+    FROM matches m
+    JOIN public.calls c ON c.id = m.call_id
+    LEFT JOIN public.leads l ON l.id = c.lead_id
+    CROSS JOIN q
+    ORDER BY m.rank DESC, m.call_id;
+$$ LANGUAGE sql STABLE;
@@ -0,0 +1,102 @@
+-- Migration 012: canonical E.164 phone numbers on leads
+-- Run this in your Supabase SQL Editor after upgrading the backend.
+--
+-- Adds the phone_e164 column ("+15551234567"), which the backend fills in
+-- on every insert/update and uses for duplicate detection, phone search
+-- and dialing, so "+1 (555) 123-4567", "555-123-4567" and "5551234567"
+-- are the same number. Existing leads are backfilled afterwards with
+-- backfill_phone_e164(), using the backend's PHONE_DEFAULT_COUNTRY_CODE:
+-- call POST /api/leads/phones:normalize, or run
+--     SELECT backfill_phone_e164('1');
+-- here with your PHONE_DEFAULT_COUNTRY_CODE.
+
+ALTER TABLE public.leads ADD COLUMN IF NOT EXISTS phone_e164 VARCHAR(16);
+
+CREATE INDEX IF NOT EXISTS idx_leads_phone_e164 ON public.leads(phone_e164);
+
+-- Replaces the version with a DEFAULT '1' country code, if present
+DROP FUNCTION IF EXISTS phone_to_e164(TEXT, TEXT);
+
+-- E.164 form of a phone number, or NULL if it isn't a valid number.
+-- Numbers without a "+" or "00" prefix belong to default_country_code.
+CREATE OR REPLACE FUNCTION phone_to_e164(phone TEXT, default_country_code TEXT)
+RETURNS TEXT AS $$
+    WITH v AS (
+        SELECT regexp_replace(
+            regexp_replace(btrim(phone, E' \t\r\n'), '\s*(ext\.?|extension|x|#)\s*\d{1,6}\s*$', '', 'i'),
+            '^(\d+)\.0+$', '\1'
+        ) AS value
+    ), d AS (
+        SELECT value, regexp_replace(value, '\D', '', 'g') AS digits FROM v
+    ), n AS (
+        SELECT CASE
+            WHEN value LIKE '+%' THEN digits
+            WHEN digits LIKE '00%' THEN substr(digits, 3)
+            WHEN default_country_code = '1' THEN
+                CASE WHEN length(digits) = 11 AND digits LIKE '1%' THEN digits ELSE '1' || digits END
+            ELSE default_country_code || regexp_replace(digits, '^0', '')
+        END AS number
+        FROM d
+    )
+    SELECT CASE WHEN number ~ '^(1[2-9]\d{9}|[2-9]\d{7,14})$' THEN '+' || number END FROM n;
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Fills in phone_e164 for leads that don't have it yet and returns how many
+-- were set. Pass the backend's PHONE_DEFAULT_COUNTRY_CODE, so national
+-- numbers are read the same way app/utils/phone.py reads them; the backend
+-- does this in POST /api/leads/phones:normalize.
+CREATE OR REPLACE FUNCTION backfill_phone_e164(p_default_country_code TEXT)
+RETURNS INTEGER AS $$
+    WITH updated AS (
+        UPDATE public.leads
+        SET phone_e164 = phone_to_e164(phone, p_default_country_code)
+        WHERE phone_e164 IS NULL
+          AND phone_to_e164(phone, p_default_country_code) IS NOT NULL
+        RETURNING 1
+    )
+    SELECT count(*)::INTEGER FROM updated;
+$$ LANGUAGE sql;
+
+-- search_leads() gains phone_key: the E.164 form of the search (if it is a
+-- phone number), matched exactly against phone_e164 and ranked first
+DROP FUNCTION IF EXISTS search_leads(TEXT, TEXT, INTEGER, INTEGER);
+
+CREATE OR REPLACE FUNCTION search_leads(
+    search_query TEXT,
+    status_filter TEXT DEFAULT NULL,
+    result_limit INTEGER DEFAULT 50,
+    result_offset INTEGER DEFAULT 0,
+    phone_key TEXT DEFAULT NULL
+)
+RETURNS SETOF public.leads AS $$
+    WITH q AS (
+        SELECT
+            -- Escape LIKE wildcards so user input is matched literally
+            '%' || replace(replace(replace(trim(search_query), '\', '\\'), '%', '\%'), '_', '\_') || '%' AS pattern,
+            trim(search_query) AS raw,
+            regexp_replace(search_query, '\D', '', 'g') AS digits,
+            (
+                SELECT to_tsquery('simple', string_agg(quote_literal(word) || ':*', ' & '))
+                FROM regexp_split_to_table(lower(trim(search_query)), '\s+') AS word
+                WHERE word <> ''
+            ) AS tsq
+    )
+    SELECT l.*
+    FROM public.leads l, q
+    WHERE (status_filter IS NULL OR l.status = status_filter)
+      AND (
+            to_tsvector('simple', coalesce(l.name, '') || ' ' || coalesce(l.business_name, '')) @@ q.tsq
+         OR l.name ILIKE q.pattern
+         OR l.business_name ILIKE q.pattern
+         OR (length(q.digits) >= 3 AND l.phone_digits LIKE '%' || q.digits || '%')
+         OR l.phone_e164 = phone_key
+      )
+    ORDER BY
+        (CASE WHEN l.phone_e164 = phone_key THEN 3 ELSE 0 END)
+        + (CASE WHEN length(q.digits) >= 3 AND l.phone_digits = q.digits THEN 2 ELSE 0 END)
+        + coalesce(ts_rank(to_tsvector('simple', coalesce(l.name, '') || ' ' || coalesce(l.business_name, '')), q.tsq), 0)
+        + greatest(similarity(l.name, q.raw), similarity(coalesce(l.business_name, ''), q.raw)) DESC,
+        l.created_at DESC,
+        l.id DESC
+    LIMIT result_limit OFFSET result_offset;
+$$ LANGUAGE sql STABLE;
@@ -0,0 +1,33 @@
+-- Migration 013: skipped/failed markers for the call analysis worker
+-- Run this in your Supabase SQL Editor after upgrading the backend.
+--
+-- Calls the worker can't score (too little conversation, or the scorer
+-- failed) used to stay "pending" forever and could fill every batch. They
+-- now get metadata.analysis_status, and analyze_pending leaves out
+-- everything except retryable 'failed' calls.
+
+-- Mark calls the analysis worker couldn't score, so they stop being picked
+-- up as pending. 'skipped' (too little conversation) is final; 'failed'
+-- calls are retried until p_max_attempts, then marked 'given_up'.
+-- metadata.analysis_attempts counts the attempts.
+CREATE OR REPLACE FUNCTION mark_call_analysis(
+    p_call_ids UUID[],
+    p_status TEXT,
+    p_max_attempts INTEGER DEFAULT 3
+)
+RETURNS VOID AS $$
+    UPDATE public.calls c
+    SET metadata = COALESCE(c.metadata, '{}'::jsonb) || jsonb_build_object(
+        'analysis_attempts', a.attempts,
+        'analysis_status', CASE
+            WHEN p_status = 'failed' AND a.attempts >= p_max_attempts THEN 'given_up'
+            ELSE p_status
+        END
+    )
+    FROM (
+        SELECT id, COALESCE((metadata->>'analysis_attempts')::INTEGER, 0) + 1 AS attempts
+        FROM public.calls
+        WHERE id = ANY(p_call_ids)
+    ) a
+    WHERE c.id = a.id;
+$$ LANGUAGE sql;
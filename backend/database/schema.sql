@@ -4,6 +4,9 @@
 -- Enable UUID extension (if not already enabled)
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
 
+-- Trigram indexes for substring lead search
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
 -- =====================================================
 -- LEADS TABLE
 -- =====================================================
@@ -12,6 +15,9 @@ CREATE TABLE IF NOT EXISTS public.leads (
     name VARCHAR(255) NOT NULL,
     business_name VARCHAR(255),
     phone VARCHAR(50) NOT NULL,
+    phone_digits TEXT GENERATED ALWAYS AS (regexp_replace(phone, '\D', '', 'g')) STORED,
+    -- Canonical "+15551234567" form, set by the backend (see phone_to_e164 below)
+    phone_e164 VARCHAR(16),
     email VARCHAR(255),
     address TEXT,
     city VARCHAR(100),
@@ -25,17 +31,124 @@ CREATE TABLE IF NOT EXISTS public.leads (
     tags TEXT[] DEFAULT ARRAY[]::TEXT[],
     notes TEXT,
     status VARCHAR(50) DEFAULT 'active',
+    -- Denormalized last-call summary, maintained by the backend
+    last_call_id UUID,
+    last_call_at TIMESTAMP WITH TIME ZONE,
+    last_call_status VARCHAR(50),
+    call_count INTEGER NOT NULL DEFAULT 0,
+    last_ai_score INTEGER,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
 -- Create indexes for leads table
 CREATE INDEX IF NOT EXISTS idx_leads_phone ON public.leads(phone);
+CREATE INDEX IF NOT EXISTS idx_leads_phone_e164 ON public.leads(phone_e164);
 CREATE INDEX IF NOT EXISTS idx_leads_email ON public.leads(email);
 CREATE INDEX IF NOT EXISTS idx_leads_status ON public.leads(status);
 CREATE INDEX IF NOT EXISTS idx_leads_source ON public.leads(source);
 CREATE INDEX IF NOT EXISTS idx_leads_google_place_id ON public.leads(google_place_id);
-CREATE INDEX IF NOT EXISTS idx_leads_created_at ON public.leads(created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_leads_created_at_id ON public.leads(created_at DESC NULLS LAST, id DESC);
+CREATE INDEX IF NOT EXISTS idx_leads_last_call_id ON public.leads(last_call_id);
+
+-- Search indexes (see search_leads below)
+CREATE INDEX IF NOT EXISTS idx_leads_search_fts ON public.leads
+    USING GIN (to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(business_name, '')));
+CREATE INDEX IF NOT EXISTS idx_leads_name_trgm ON public.leads USING GIN (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_leads_business_name_trgm ON public.leads USING GIN (business_name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_leads_phone_digits_trgm ON public.leads USING GIN (phone_digits gin_trgm_ops);
+
+-- =====================================================
+-- PHONE NUMBERS
+-- =====================================================
+-- E.164 form of a phone number, or NULL if it isn't a valid number.
+-- Numbers without a "+" or "00" prefix belong to default_country_code.
+-- Mirrors app/utils/phone.py, which sets phone_e164 on every write; this
+-- is used by backfill_phone_e164() below.
+CREATE OR REPLACE FUNCTION phone_to_e164(phone TEXT, default_country_code TEXT)
+RETURNS TEXT AS $$
+    WITH v AS (
+        SELECT regexp_replace(
+            regexp_replace(btrim(phone, E' \t\r\n'), '\s*(ext\.?|extension|x|#)\s*\d{1,6}\s*$', '', 'i'),
+            '^(\d+)\.0+$', '\1'
+        ) AS value
+    ), d AS (
+        SELECT value, regexp_replace(value, '\D', '', 'g') AS digits FROM v
+    ), n AS (
+        SELECT CASE
+            WHEN value LIKE '+%' THEN digits
+            WHEN digits LIKE '00%' THEN substr(digits, 3)
+            WHEN default_country_code = '1' THEN
+                CASE WHEN length(digits) = 11 AND digits LIKE '1%' THEN digits ELSE '1' || digits END
+            ELSE default_country_code || regexp_replace(digits, '^0', '')
+        END AS number
+        FROM d
+    )
+    SELECT CASE WHEN number ~ '^(1[2-9]\d{9}|[2-9]\d{7,14})$' THEN '+' || number END FROM n;
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Fills in phone_e164 for leads that don't have it yet and returns how many
+-- were set. Pass the backend's PHONE_DEFAULT_COUNTRY_CODE, so national
+-- numbers are read the same way app/utils/phone.py reads them; the backend
+-- does this in POST /api/leads/phones:normalize.
+CREATE OR REPLACE FUNCTION backfill_phone_e164(p_default_country_code TEXT)
+RETURNS INTEGER AS $$
+    WITH updated AS (
+        UPDATE public.leads
+        SET phone_e164 = phone_to_e164(phone, p_default_country_code)
+        WHERE phone_e164 IS NULL
+          AND phone_to_e164(phone, p_default_country_code) IS NOT NULL
+        RETURNING 1
+    )
+    SELECT count(*)::INTEGER FROM updated;
+$$ LANGUAGE sql;
+
+-- =====================================================
+-- LEAD SEARCH
+-- =====================================================
+-- Ranked lead search used by GET /api/leads?search=
+-- Matches word prefixes (full-text), substrings of name/business_name
+-- (trigram), digit substrings of the phone number, and the exact E.164
+-- number when the backend passes the search's phone_key.
+CREATE OR REPLACE FUNCTION search_leads(
+    search_query TEXT,
+    status_filter TEXT DEFAULT NULL,
+    result_limit INTEGER DEFAULT 50,
+    result_offset INTEGER DEFAULT 0,
+    phone_key TEXT DEFAULT NULL
+)
+RETURNS SETOF public.leads AS $$
+    WITH q AS (
+        SELECT
+            -- Escape LIKE wildcards so user input is matched literally
+            '%' || replace(replace(replace(trim(search_query), '\', '\\'), '%', '\%'), '_', '\_') || '%' AS pattern,
+            trim(search_query) AS raw,
+            regexp_replace(search_query, '\D', '', 'g') AS digits,
+            (
+                SELECT to_tsquery('simple', string_agg(quote_literal(word) || ':*', ' & '))
+                FROM regexp_split_to_table(lower(trim(search_query)), '\s+') AS word
+                WHERE word <> ''
+            ) AS tsq
+    )
+    SELECT l.*
+    FROM public.leads l, q
+    WHERE (status_filter IS NULL OR l.status = status_filter)
+      AND (
+            to_tsvector('simple', coalesce(l.name, '') || ' ' || coalesce(l.business_name, '')) @@ q.tsq
+         OR l.name ILIKE q.pattern
+         OR l.business_name ILIKE q.pattern
+         OR (length(q.digits) >= 3 AND l.phone_digits LIKE '%' || q.digits || '%')
+         OR l.phone_e164 = phone_key
+      )
+    ORDER BY
+        (CASE WHEN l.phone_e164 = phone_key THEN 3 ELSE 0 END)
+        + (CASE WHEN length(q.digits) >= 3 AND l.phone_digits = q.digits THEN 2 ELSE 0 END)
+        + coalesce(ts_rank(to_tsvector('simple', coalesce(l.name, '') || ' ' || coalesce(l.business_name, '')), q.tsq), 0)
+        + greatest(similarity(l.name, q.raw), similarity(coalesce(l.business_name, ''), q.raw)) DESC,
+        l.created_at DESC,
+        l.id DESC
+    LIMIT result_limit OFFSET result_offset;
+$$ LANGUAGE sql STABLE;
 
 -- =====================================================
 -- CALLS TABLE
@@ -56,6 +169,10 @@ CREATE TABLE IF NOT EXISTS public.calls (
     summary TEXT,
     metadata JSONB DEFAULT '{}'::jsonb,
     cost DECIMAL(10,4),
+    -- Cold storage: compressed {transcript, metadata} of archived calls
+    transcript_archive BYTEA,
+    archive_codec VARCHAR(10),
+    archived_at TIMESTAMP WITH TIME ZONE,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
@@ -66,6 +183,484 @@ CREATE INDEX IF NOT EXISTS idx_calls_provider ON public.calls(provider);
 CREATE INDEX IF NOT EXISTS idx_calls_status ON public.calls(status);
 CREATE INDEX IF NOT EXISTS idx_calls_provider_call_id ON public.calls(provider_call_id);
 CREATE INDEX IF NOT EXISTS idx_calls_created_at ON public.calls(created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_calls_start_time_id ON public.calls(start_time DESC NULLS LAST, id DESC);
+-- Finds ended calls that are not archived yet
+CREATE INDEX IF NOT EXISTS idx_calls_archive_candidates ON public.calls(end_time)
+    WHERE archived_at IS NULL;
+
+-- =====================================================
+-- LEAD LAST-CALL SUMMARY
+-- =====================================================
+-- Count a new call against its lead and make it the lead's last call if it
+-- is the newest one. Called by the backend whenever a call row is created.
+CREATE OR REPLACE FUNCTION record_lead_call(
+    p_lead_id UUID,
+    p_call_id UUID,
+    p_call_at TIMESTAMP WITH TIME ZONE,
+    p_status TEXT
+)
+RETURNS VOID AS $$
+    UPDATE public.leads
+    SET
+        call_count = call_count + 1,
+        last_call_id = CASE WHEN last_call_at IS NULL OR p_call_at >= last_call_at THEN p_call_id ELSE last_call_id END,
+        last_call_status = CASE WHEN last_call_at IS NULL OR p_call_at >= last_call_at THEN p_status ELSE last_call_status END,
+        last_ai_score = CASE WHEN last_call_at IS NULL OR p_call_at >= last_call_at THEN NULL ELSE last_ai_score END,
+        last_call_at = GREATEST(last_call_at, p_call_at)
+    WHERE id = p_lead_id;
+$$ LANGUAGE sql;
+
+-- =====================================================
+-- CALL ANALYSIS
+-- =====================================================
+-- Save AI analyses for many calls in one statement. ai_score and
+-- qualification are merged into metadata with `||`, so concurrent writes to
+-- other metadata keys are preserved, and the lead's last_ai_score follows
+-- when the call is the lead's last call.
+-- p_analyses: [{"id", "summary", "ai_score", "qualification"}, ...]
+CREATE OR REPLACE FUNCTION apply_call_analyses(p_analyses JSONB)
+RETURNS TABLE (call_id UUID, lead_id UUID) AS $$
+    WITH analyses AS (
+        SELECT DISTINCT ON (a.id) a.*
+        FROM jsonb_to_recordset(p_analyses)
+            AS a(id UUID, summary TEXT, ai_score INTEGER, qualification TEXT)
+    ),
+    updated AS (
+        UPDATE public.calls c
+        SET
+            summary = a.summary,
+            metadata = COALESCE(c.metadata, '{}'::jsonb) || jsonb_build_object(
+                'ai_score', a.ai_score,
+                'qualification', a.qualification
+            )
+        FROM analyses a
+        WHERE c.id = a.id
+        RETURNING c.id, c.lead_id, a.ai_score
+    ),
+    scored_leads AS (
+        UPDATE public.leads l
+        SET last_ai_score = u.ai_score
+        FROM updated u
+        WHERE l.last_call_id = u.id
+        RETURNING l.id
+    )
+    SELECT u.id, u.lead_id FROM updated u;
+$$ LANGUAGE sql;
+
+-- Mark calls the analysis worker couldn't score, so they stop being picked
+-- up as pending. 'skipped' (too little conversation) is final; 'failed'
+-- calls are retried until p_max_attempts, then marked 'given_up'.
+-- metadata.analysis_attempts counts the attempts.
+CREATE OR REPLACE FUNCTION mark_call_analysis(
+    p_call_ids UUID[],
+    p_status TEXT,
+    p_max_attempts INTEGER DEFAULT 3
+)
+RETURNS VOID AS $$
+    UPDATE public.calls c
+    SET metadata = COALESCE(c.metadata, '{}'::jsonb) || jsonb_build_object(
+        'analysis_attempts', a.attempts,
+        'analysis_status', CASE
+            WHEN p_status = 'failed' AND a.attempts >= p_max_attempts THEN 'given_up'
+            ELSE p_status
+        END
+    )
+    FROM (
+        SELECT id, COALESCE((metadata->>'analysis_attempts')::INTEGER, 0) + 1 AS attempts
+        FROM public.calls
+        WHERE id = ANY(p_call_ids)
+    ) a
+    WHERE c.id = a.id;
+$$ LANGUAGE sql;
+
+-- =====================================================
+-- INCREMENTAL TRANSCRIPTS
+-- =====================================================
+-- Transcript entries after a sequence number (array position), sliced in
+-- the database so polling only transfers new entries. Archived calls
+-- report archived=true and are rehydrated by the backend instead.
+-- Used by GET /api/calls/{id}/transcript?since=
+CREATE OR REPLACE FUNCTION call_transcript_since(p_call_id UUID, p_since INTEGER DEFAULT -1)
+RETURNS JSONB AS $$
+    SELECT jsonb_build_object(
+        'entries', jsonb_path_query_array(
+            coalesce(c.transcript, '[]'::jsonb),
+            '$[$from to last]',
+            jsonb_build_object('from', greatest(p_since + 1, 0))
+        ),
+        'length', jsonb_array_length(coalesce(c.transcript, '[]'::jsonb)),
+        'recording_url', c.recording_url,
+        'archived', c.archived_at IS NOT NULL
+    )
+    FROM public.calls c
+    WHERE c.id = p_call_id;
+$$ LANGUAGE sql STABLE;
+
+-- =====================================================
+-- TRANSCRIPT SEARCH
+-- =====================================================
+-- Full-text index of finished calls' transcripts, kept in its own table so
+-- `select *` on calls never carries the tsvector. Rows are written by the
+-- trigger below once a call is completed or ended. `content` is the indexed
+-- text, which search snippets are built from; it outlives archival, which
+-- empties calls.transcript.
+CREATE TABLE IF NOT EXISTS public.call_transcript_index (
+    call_id UUID PRIMARY KEY REFERENCES public.calls(id) ON DELETE CASCADE,
+    document TSVECTOR NOT NULL,
+    content TEXT NOT NULL DEFAULT ''
+);
+
+CREATE INDEX IF NOT EXISTS idx_call_transcript_index_document
+    ON public.call_transcript_index USING GIN (document);
+
+-- Conversation text of a compact transcript (user and assistant turns only)
+CREATE OR REPLACE FUNCTION call_transcript_text(p_transcript JSONB)
+RETURNS TEXT AS $$
+    SELECT coalesce(string_agg(t.entry->>'content', E'\n' ORDER BY t.seq), '')
+    FROM jsonb_array_elements(
+        CASE WHEN jsonb_typeof(p_transcript) = 'array' THEN p_transcript ELSE '[]'::jsonb END
+    ) WITH ORDINALITY AS t(entry, seq)
+    WHERE t.entry->>'role' IN ('user', 'assistant');
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Index a call's transcript when it finishes, and again if a finished
+-- call's transcript changes. In-progress calls are not indexed, so live
+-- per-utterance appends never rebuild the tsvector.
+CREATE OR REPLACE FUNCTION index_call_transcript()
+RETURNS TRIGGER AS $$
+BEGIN
+    -- Archival empties calls.transcript; the index row and its content stay as they are
+    IF NEW.status NOT IN ('completed', 'ended') OR NEW.archived_at IS NOT NULL THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP = 'UPDATE'
+       AND NEW.transcript IS NOT DISTINCT FROM OLD.transcript
+       AND EXISTS (SELECT 1 FROM public.call_transcript_index WHERE call_id = NEW.id) THEN
+        RETURN NULL;
+    END IF;
+
+    INSERT INTO public.call_transcript_index (call_id, document, content)
+    SELECT NEW.id, to_tsvector('english', t.content), t.content
+    FROM (SELECT call_transcript_text(NEW.transcript) AS content) AS t
+    ON CONFLICT (call_id) DO UPDATE SET document = EXCLUDED.document, content = EXCLUDED.content;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS index_calls_transcript ON public.calls;
+CREATE TRIGGER index_calls_transcript
+    AFTER INSERT OR UPDATE OF transcript, status ON public.calls
+    FOR EACH ROW
+    EXECUTE FUNCTION index_call_transcript();
+
+-- Ranked transcript search used by GET /api/calls/search?q=
+-- Accepts web-search syntax ("quoted phrases", OR, -excluded). Ranked by
+-- cover density normalized by log document length; highlighted snippets
+-- are only built for the returned page.
+CREATE OR REPLACE FUNCTION search_call_transcripts(
+    search_query TEXT,
+    result_limit INTEGER DEFAULT 20,
+    result_offset INTEGER DEFAULT 0
+)
+RETURNS TABLE (
+    id UUID,
+    lead_id UUID,
+    lead_name VARCHAR,
+    business_name VARCHAR,
+    provider VARCHAR,
+    status VARCHAR,
+    purpose TEXT,
+    start_time TIMESTAMP WITH TIME ZONE,
+    duration_seconds INTEGER,
+    rank REAL,
+    snippet TEXT
+) AS $$
+    WITH q AS (
+        SELECT websearch_to_tsquery('english', search_query) AS tsq
+    ),
+    matches AS (
+        SELECT i.call_id, i.content, ts_rank_cd(i.document, q.tsq, 1) AS rank
+        FROM public.call_transcript_index i, q
+        WHERE i.document @@ q.tsq
+        ORDER BY rank DESC, i.call_id
+        LIMIT result_limit OFFSET result_offset
+    )
+    SELECT
+        c.id, c.lead_id, l.name, l.business_name, c.provider, c.status, c.purpose, c.start_time,
+        c.duration_seconds, m.rank,
+        ts_headline(
+            'english', m.content, q.tsq,
+            'StartSel=<mark>, StopSel=</mark>, MaxFragments=3, MinWords=5, MaxWords=20, FragmentDelimiter=" … "'
+        )
+    FROM matches m
+    JOIN public.calls c ON c.id = m.call_id
+    LEFT JOIN public.leads l ON l.id = c.lead_id
+    CROSS JOIN q
+    ORDER BY m.rank DESC, m.call_id;
+$$ LANGUAGE sql STABLE;
+
+-- =====================================================
+-- DASHBOARD SUMMARY
+-- =====================================================
+-- Lead and call counts grouped by status in a single round trip,
+-- used by GET /api/stats/summary
+CREATE OR REPLACE FUNCTION dashboard_summary()
+RETURNS JSONB AS $$
+    SELECT jsonb_build_object(
+        'leads', (
+            SELECT coalesce(jsonb_object_agg(status, n), '{}'::jsonb)
+            FROM (
+                SELECT coalesce(status, 'unknown') AS status, count(*) AS n
+                FROM public.leads GROUP BY 1
+            ) AS lead_counts
+        ),
+        'calls', (
+            SELECT coalesce(jsonb_object_agg(status, n), '{}'::jsonb)
+            FROM (
+                SELECT coalesce(status, 'unknown') AS status, count(*) AS n
+                FROM public.calls GROUP BY 1
+            ) AS call_counts
+        )
+    );
+$$ LANGUAGE sql STABLE;
+
+-- =====================================================
+-- CALL ANALYTICS ROLLUPS
+-- =====================================================
+-- Hourly and daily call aggregates per provider, purpose, status and
+-- ai_score decile (score_bucket 0-9, -1 = not scored yet), read by
+-- /api/analytics/* instead of scanning calls
+CREATE TABLE IF NOT EXISTS public.call_rollups (
+    granularity VARCHAR(5) NOT NULL,
+    bucket_start TIMESTAMP WITH TIME ZONE NOT NULL,
+    provider VARCHAR(20) NOT NULL,
+    purpose TEXT NOT NULL DEFAULT '',
+    status VARCHAR(50) NOT NULL,
+    score_bucket SMALLINT NOT NULL DEFAULT -1,
+    calls INTEGER NOT NULL DEFAULT 0,
+    connected INTEGER NOT NULL DEFAULT 0,
+    qualified INTEGER NOT NULL DEFAULT 0,
+    duration_seconds BIGINT NOT NULL DEFAULT 0,
+    cost DECIMAL(14,4) NOT NULL DEFAULT 0,
+    ai_score_sum BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (granularity, bucket_start, provider, purpose, status, score_bucket)
+);
+
+-- The values each call was last counted with, so a re-recorded call only
+-- moves its own previous contribution and recording is idempotent
+CREATE TABLE IF NOT EXISTS public.call_rollup_state (
+    call_id UUID PRIMARY KEY,
+    bucket_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    provider VARCHAR(20) NOT NULL,
+    purpose TEXT NOT NULL,
+    status VARCHAR(50) NOT NULL,
+    duration_seconds INTEGER NOT NULL,
+    cost DECIMAL(10,4) NOT NULL,
+    ai_score INTEGER,
+    qualified BOOLEAN NOT NULL
+);
+
+-- Fold the current state of the given calls into call_rollups. Each changed
+-- call retracts its last snapshot and adds its current values; unchanged
+-- calls are no-ops. Called after every call write (webhooks, analyses).
+-- Returns the number of calls whose contribution changed.
+CREATE OR REPLACE FUNCTION record_call_rollups(p_call_ids UUID[])
+RETURNS INTEGER AS $$
+DECLARE
+    changed_count INTEGER;
+BEGIN
+    -- Serialize concurrent recordings of the same call so a delta is applied once
+    PERFORM pg_advisory_xact_lock(hashtextextended(ids.id::text, 0))
+    FROM (SELECT DISTINCT unnest(p_call_ids) AS id ORDER BY 1) AS ids;
+
+    WITH current_calls AS (
+        SELECT
+            c.id AS call_id,
+            COALESCE(c.start_time, c.created_at) AS bucket_at,
+            c.provider,
+            COALESCE(c.purpose, '') AS purpose,
+            COALESCE(c.status, 'unknown') AS status,
+            COALESCE(c.duration_seconds, 0) AS duration_seconds,
+            COALESCE(c.cost, 0) AS cost,
+            ROUND((c.metadata->>'ai_score')::numeric)::INTEGER AS ai_score,
+            COALESCE(c.metadata->>'qualification' = 'qualified', FALSE) AS qualified
+        FROM public.calls c
+        WHERE c.id = ANY(p_call_ids)
+    ),
+    changed AS (
+        SELECT cur.*
+        FROM current_calls cur
+        LEFT JOIN public.call_rollup_state s ON s.call_id = cur.call_id
+        WHERE s.call_id IS NULL
+           OR (s.bucket_at, s.provider, s.purpose, s.status, s.duration_seconds,
+               s.cost, s.ai_score, s.qualified)
+              IS DISTINCT FROM
+              (cur.bucket_at, cur.provider, cur.purpose, cur.status, cur.duration_seconds,
+               cur.cost, cur.ai_score, cur.qualified)
+    ),
+    contributions AS (
+        SELECT s.bucket_at, s.provider, s.purpose, s.status, s.duration_seconds,
+               s.cost, s.ai_score, s.qualified, -1 AS sign
+        FROM public.call_rollup_state s
+        JOIN changed ch ON ch.call_id = s.call_id
+        UNION ALL
+        SELECT ch.bucket_at, ch.provider, ch.purpose, ch.status, ch.duration_seconds,
+               ch.cost, ch.ai_score, ch.qualified, 1 AS sign
+        FROM changed ch
+    ),
+    deltas AS (
+        SELECT
+            g.granularity,
+            date_trunc(g.granularity, c.bucket_at, 'UTC') AS bucket_start,
+            c.provider,
+            c.purpose,
+            c.status,
+            COALESCE(LEAST(GREATEST(c.ai_score, 0), 99) / 10, -1) AS score_bucket,
+            SUM(c.sign) AS calls,
+            SUM(c.sign * (c.duration_seconds > 0)::int) AS connected,
+            SUM(c.sign * c.qualified::int) AS qualified,
+            SUM(c.sign * c.duration_seconds) AS duration_seconds,
+            SUM(c.sign * c.cost) AS cost,
+            SUM(c.sign * COALESCE(c.ai_score, 0)) AS ai_score_sum
+        FROM contributions c
+        CROSS JOIN (VALUES ('hour'), ('day')) AS g(granularity)
+        GROUP BY 1, 2, 3, 4, 5, 6
+    ),
+    applied AS (
+        INSERT INTO public.call_rollups AS r (
+            granularity, bucket_start, provider, purpose, status, score_bucket,
+            calls, connected, qualified, duration_seconds, cost, ai_score_sum
+        )
+        SELECT * FROM deltas
+        ON CONFLICT (granularity, bucket_start, provider, purpose, status, score_bucket)
+        DO UPDATE SET
+            calls = r.calls + EXCLUDED.calls,
+            connected = r.connected + EXCLUDED.connected,
+            qualified = r.qualified + EXCLUDED.qualified,
+            duration_seconds = r.duration_seconds + EXCLUDED.duration_seconds,
+            cost = r.cost + EXCLUDED.cost,
+            ai_score_sum = r.ai_score_sum + EXCLUDED.ai_score_sum
+        RETURNING 1
+    ),
+    snapshots AS (
+        INSERT INTO public.call_rollup_state AS s (
+            call_id, bucket_at, provider, purpose, status, duration_seconds,
+            cost, ai_score, qualified
+        )
+        SELECT call_id, bucket_at, provider, purpose, status, duration_seconds,
+               cost, ai_score, qualified
+        FROM changed
+        ON CONFLICT (call_id) DO UPDATE SET
+            bucket_at = EXCLUDED.bucket_at,
+            provider = EXCLUDED.provider,
+            purpose = EXCLUDED.purpose,
+            status = EXCLUDED.status,
+            duration_seconds = EXCLUDED.duration_seconds,
+            cost = EXCLUDED.cost,
+            ai_score = EXCLUDED.ai_score,
+            qualified = EXCLUDED.qualified
+        RETURNING 1
+    )
+    SELECT count(*) INTO changed_count FROM snapshots;
+
+    RETURN changed_count;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Recompute every rollup from the calls table. Use for the initial
+-- backfill, or to drop the contribution of deleted calls.
+CREATE OR REPLACE FUNCTION rebuild_call_rollups()
+RETURNS INTEGER AS $$
+BEGIN
+    DELETE FROM public.call_rollups;
+    DELETE FROM public.call_rollup_state;
+    RETURN record_call_rollups(ARRAY(SELECT id FROM public.calls));
+END;
+$$ LANGUAGE plpgsql;
+
+-- Aggregated rollup buckets for a time range, optionally grouped by
+-- provider or purpose (p_group_by: 'none', 'provider' or 'purpose').
+-- by_status maps status -> calls; score_histogram maps decile -> calls.
+CREATE OR REPLACE FUNCTION call_rollup_series(
+    p_granularity TEXT DEFAULT 'day',
+    p_from TIMESTAMP WITH TIME ZONE DEFAULT NULL,
+    p_to TIMESTAMP WITH TIME ZONE DEFAULT NULL,
+    p_provider TEXT DEFAULT NULL,
+    p_purpose TEXT DEFAULT NULL,
+    p_group_by TEXT DEFAULT 'none'
+)
+RETURNS TABLE (
+    bucket_start TIMESTAMP WITH TIME ZONE,
+    group_key TEXT,
+    calls BIGINT,
+    connected BIGINT,
+    qualified BIGINT,
+    duration_seconds BIGINT,
+    cost NUMERIC,
+    scored BIGINT,
+    ai_score_sum BIGINT,
+    by_status JSONB,
+    score_histogram JSONB
+) AS $$
+    WITH filtered AS (
+        SELECT
+            r.*,
+            CASE p_group_by
+                WHEN 'provider' THEN r.provider
+                WHEN 'purpose' THEN r.purpose
+            END AS group_key
+        FROM public.call_rollups r
+        WHERE r.granularity = p_granularity
+          AND (p_from IS NULL OR r.bucket_start >= p_from)
+          AND (p_to IS NULL OR r.bucket_start < p_to)
+          AND (p_provider IS NULL OR r.provider = p_provider)
+          AND (p_purpose IS NULL OR r.purpose = p_purpose)
+          AND r.calls <> 0
+    ),
+    statuses AS (
+        SELECT s.bucket_start, s.group_key, jsonb_object_agg(s.status, s.n) AS by_status
+        FROM (
+            SELECT f.bucket_start, f.group_key, f.status, SUM(f.calls) AS n
+            FROM filtered f GROUP BY 1, 2, 3
+        ) AS s
+        GROUP BY 1, 2
+    ),
+    histogram AS (
+        SELECT h.bucket_start, h.group_key, jsonb_object_agg(h.decile, h.n) AS score_histogram
+        FROM (
+            SELECT f.bucket_start, f.group_key, (f.score_bucket * 10)::text AS decile, SUM(f.calls) AS n
+            FROM filtered f WHERE f.score_bucket >= 0 GROUP BY 1, 2, 3
+        ) AS h
+        GROUP BY 1, 2
+    ),
+    totals AS (
+        SELECT
+            f.bucket_start,
+            f.group_key,
+            SUM(f.calls)::BIGINT AS calls,
+            SUM(f.connected)::BIGINT AS connected,
+            SUM(f.qualified)::BIGINT AS qualified,
+            SUM(f.duration_seconds)::BIGINT AS duration_seconds,
+            SUM(f.cost) AS cost,
+            COALESCE(SUM(f.calls) FILTER (WHERE f.score_bucket >= 0), 0)::BIGINT AS scored,
+            SUM(f.ai_score_sum)::BIGINT AS ai_score_sum
+        FROM filtered f
+        GROUP BY 1, 2
+    )
+    SELECT
+        t.bucket_start, t.group_key, t.calls, t.connected, t.qualified,
+        t.duration_seconds, t.cost, t.scored, t.ai_score_sum,
+        COALESCE(s.by_status, '{}'::jsonb),
+        COALESCE(h.score_histogram, '{}'::jsonb)
+    FROM totals t
+    LEFT JOIN statuses s
+        ON s.bucket_start = t.bucket_start AND s.group_key IS NOT DISTINCT FROM t.group_key
+    LEFT JOIN histogram h
+        ON h.bucket_start = t.bucket_start AND h.group_key IS NOT DISTINCT FROM t.group_key
+    ORDER BY t.bucket_start, t.group_key;
+$$ LANGUAGE sql STABLE;
 
 -- =====================================================
 -- UPDATE TRIGGERS
@@ -118,6 +713,23 @@ CREATE TRIGGER update_agents_updated_at
     FOR EACH ROW
     EXECUTE FUNCTION update_updated_at_column();
 
+-- =====================================================
+-- ANALYSIS CACHE
+-- =====================================================
+-- Call analyses memoized by transcript content hash (sha256 of purpose and
+-- conversation text), so identical transcripts are never scored twice
+CREATE TABLE IF NOT EXISTS public.analysis_cache (
+    transcript_hash CHAR(64) PRIMARY KEY,
+    summary TEXT,
+    ai_score INTEGER,
+    qualification VARCHAR(20),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Finds completed calls still waiting for a score
+CREATE INDEX IF NOT EXISTS idx_calls_pending_analysis ON public.calls(end_time DESC)
+    WHERE (metadata->'ai_score') IS NULL AND status IN ('completed', 'ended');
+
 -- =====================================================
 -- ROW LEVEL SECURITY (RLS)
 -- =====================================================
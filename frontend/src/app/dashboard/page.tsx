@@ -9,43 +9,36 @@ import { useCalls } from '@/lib/hooks/use-calls'
 import { useQuery } from '@tanstack/react-query'
 import { api } from '@/lib/api/client'
 import { Skeleton } from '@/components/ui/skeleton'
+import type { DashboardSummary } from '@/types/api'
 
 export default function DashboardPage() {
-  // Count-only queries (fast, no payload)
-  const { data: leadsCount, isLoading: leadsLoading } = useQuery({
-    queryKey: ['leads-count'],
-    queryFn: () => api.get<{ count: number }>('/api/leads/count'),
-  })
-  const { data: activeCount, isLoading: activeLoading } = useQuery({
-    queryKey: ['leads-count-active'],
-    queryFn: () => api.get<{ count: number }>('/api/leads/count?status=active'),
-  })
-  const { data: callsCount, isLoading: callsLoading } = useQuery({
-    queryKey: ['calls-count'],
-    queryFn: () => api.get<{ count: number }>('/api/calls/count'),
+  // Lead and call counts by status, in one round trip
+  const { data: summary, isLoading: summaryLoading } = useQuery({
+    queryKey: ['stats-summary'],
+    queryFn: () => api.get<DashboardSummary>('/api/stats/summary'),
   })
   // Small fetch for the recent activity preview lists
-  const { data: leads } = useLeads({ limit: 5 })
-  const { data: calls } = useCalls({ limit: 5 })
+  const { data: leads, isLoading: leadsLoading } = useLeads({ limit: 5 })
+  const { data: calls, isLoading: callsLoading } = useCalls({ limit: 5 })
 
   const stats = [
     {
       title: 'Total Leads',
-      value: leadsCount?.count ?? 0,
+      value: summary?.leads.total ?? 0,
       icon: Users,
       color: 'text-blue-400',
       bgColor: 'bg-blue-500/20',
     },
     {
       title: 'Total Calls',
-      value: callsCount?.count ?? 0,
+      value: summary?.calls.total ?? 0,
       icon: Phone,
       color: 'text-green-400',
       bgColor: 'bg-green-500/20',
     },
     {
       title: 'Active Leads',
-      value: activeCount?.count ?? 0,
+      value: summary?.leads.by_status.active ?? 0,
       icon: TrendingUp,
       color: 'text-purple-400',
       bgColor: 'bg-purple-500/20',
@@ -104,7 +97,7 @@ export default function DashboardPage() {
                 <div className="flex items-center justify-between">
                   <div>
                     <p className="text-sm text-secondary mb-1">{stat.title}</p>
-                    {leadsLoading || callsLoading || activeLoading ? (
+                    {summaryLoading ? (
                       <Skeleton className="h-8 w-16" />
                     ) : (
                       <p className="text-3xl font-bold">{stat.value}</p>
@@ -28,10 +28,14 @@ function formatDuration(s?: number) {
 }
 
 function computeScore(call: Call): number {
-  if (call.metadata?.ai_score) return Number(call.metadata.ai_score)
+  const aiScore = call.ai_score ?? call.metadata?.ai_score
+  if (aiScore) return Number(aiScore)
   const done = call.status === 'completed' || call.status === 'ended'
   if (!done) return 0
-  const hasConv = (call.transcript || []).filter(m => m.role !== 'system').length > 2
+  // List rows have no transcript; fall back to whether the call connected at all
+  const hasConv = call.transcript
+    ? call.transcript.filter(m => m.role !== 'system').length > 2
+    : (call.duration_seconds || 0) > 0
   if (hasConv && (call.duration_seconds || 0) > 60) return 75
   if (hasConv) return 50
   return 20
@@ -263,10 +267,10 @@ export default function HistoryPage() {
     setAnalyzingAll(true)
     setAnalyzeResult(null)
     // Only analyze completed calls that don't have a real AI score yet
+    // (the analyze route skips calls with too little transcript)
     const toAnalyze = calls.filter(c =>
       (c.status === 'completed' || c.status === 'ended') &&
-      !c.metadata?.ai_score &&
-      (c.transcript || []).filter((m: { role: string }) => m.role !== 'system').length >= 2
+      !(c.ai_score ?? c.metadata?.ai_score)
     )
     let done = 0
     for (const call of toAnalyze) {
@@ -403,7 +407,7 @@ export default function HistoryPage() {
                         {/* Context / Agent */}
                         <td className="px-4 py-4 max-w-[220px]">
                           <div className="text-[10px] font-bold text-gray-400 dark:text-gray-500 uppercase tracking-widest truncate">
-                            {call.metadata?.call_type === 'web_call' ? 'WEB CALL' : 'ONE-OFF CALL'}
+                            {(call.call_type ?? call.metadata?.call_type) === 'web_call' ? 'WEB CALL' : 'ONE-OFF CALL'}
                           </div>
                           <div className="flex items-center gap-1 mt-0.5">
                             <span className="text-gray-400 dark:text-gray-500 text-xs">⚙</span>
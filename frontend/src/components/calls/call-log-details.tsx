@@ -1,9 +1,11 @@
 'use client'
 
-import { useState } from 'react'
+import { useState, useEffect } from 'react'
 import { X, Calendar, Clock, Timer, Brain, Bot, User } from 'lucide-react'
 import type { Call } from '@/types/call'
 
+const BACKEND_BASE = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000'
+
 interface CallLogDetailsProps {
   call: Call
   onClose: () => void
@@ -27,7 +29,8 @@ function formatTime(iso?: string): string {
 }
 
 function computeAiScore(call: Call): number {
-  if (call.metadata?.ai_score) return Number(call.metadata.ai_score)
+  const aiScore = call.ai_score ?? call.metadata?.ai_score
+  if (aiScore) return Number(aiScore)
   if (call.status === 'completed' || call.status === 'ended') {
     const hasTranscript = call.transcript && call.transcript.length > 2
     const duration = call.duration_seconds || 0
@@ -44,7 +47,20 @@ function getQualificationLabel(score: number): { label: string; color: string }
   return { label: 'UNQUALIFIED', color: 'text-red-500 dark:text-red-400' }
 }
 
-export function CallLogDetails({ call, onClose }: CallLogDetailsProps) {
+export function CallLogDetails({ call: listCall, onClose }: CallLogDetailsProps) {
+  // List rows leave out transcript and metadata; load the full call when opened
+  const [fullCall, setFullCall] = useState<Call | null>(null)
+  useEffect(() => {
+    let cancelled = false
+    setFullCall(null)
+    fetch(`${BACKEND_BASE}/api/calls/${listCall.id}`)
+      .then(res => (res.ok ? res.json() : listCall))
+      .catch(() => listCall)
+      .then(data => { if (!cancelled) setFullCall(data) })
+    return () => { cancelled = true }
+  }, [listCall.id])
+  const call = fullCall ?? listCall
+
   const [activeTab, setActiveTab] = useState<'summary' | 'transcript'>('summary')
   const score = computeAiScore(call)
   const qualification = getQualificationLabel(score)
@@ -211,7 +227,7 @@ export function CallLogDetails({ call, onClose }: CallLogDetailsProps) {
             <div className="p-6">
               {conversationMessages.length === 0 ? (
                 <div className="text-center py-12 text-gray-400 dark:text-gray-500 text-sm">
-                  No transcript available for this call.
+                  {fullCall ? 'No transcript available for this call.' : 'Loading transcript…'}
                 </div>
               ) : (
                 <div className="space-y-4">
@@ -13,3 +13,14 @@ export interface ImportResult {
     error: string
   }>
 }
+
+export interface StatusCounts {
+  total: number
+  by_status: Record<string, number>
+}
+
+// GET /api/stats/summary
+export interface DashboardSummary {
+  leads: StatusCounts
+  calls: StatusCounts
+}
@@ -28,6 +28,10 @@ export interface Call {
   recording_url?: string
   summary?: string
   metadata?: Record<string, unknown>
+  // Top-level on list rows, which leave out transcript and metadata
+  ai_score?: number | null
+  qualification?: string | null
+  call_type?: string | null
   cost?: number
   created_at: string
   updated_at: string